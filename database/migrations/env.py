@@ -5,7 +5,7 @@ from alembic import context
 
 from src.config.settings import settings
 from src.app.models.base import Base
-from src.app.models import event, loket, ticket  # penting: import models
+from src.app.models import event, loket, ticket, announcement, replica_heartbeat, export_job  # penting: import models
 
 config = context.config
 
@@ -16,8 +16,10 @@ target_metadata = Base.metadata
 
 
 def get_url():
+    if settings.is_sqlite:
+        return settings.async_database_url.replace("+aiosqlite", "")
     return (
-        f"mysql+pymysql://{settings.db_user}:{settings.db_password}"
+        f"mysql+pymysql://{settings.db_user}:{settings.db_password or ''}"
         f"@{settings.db_host}:{settings.db_port}/{settings.db_name}"
     )
 
@@ -28,6 +30,7 @@ def run_migrations_offline():
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        render_as_batch=settings.is_sqlite,
     )
 
     with context.begin_transaction():
@@ -43,7 +46,14 @@ def run_migrations_online():
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        # SQLite tidak punya ALTER lengkap: autogenerate pakai batch mode;
+        # migrasi yang ditulis tangan harus pakai op.batch_alter_table
+        # untuk constraint
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=settings.is_sqlite,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -0,0 +1,36 @@
+"""add ticket queue indexes
+
+Revision ID: 8b3f1c2a9d47
+Revises: d287443cd367
+Create Date: 2026-10-17 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b3f1c2a9d47'
+down_revision: Union[str, None] = 'd287443cd367'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOTE: gagal kalau masih ada nomor dobel per loket (dari race sebelum
+    # alokasi nomor atomik); reset loket tersebut dulu sebelum upgrade.
+    # batch: SQLite tidak bisa ALTER constraint, tabel dibuat ulang; di
+    # MySQL tetap ALTER biasa
+    with op.batch_alter_table('tickets') as batch_op:
+        batch_op.create_unique_constraint('uq_tickets_loket_number', ['loket_id', 'number'])
+        batch_op.create_index('ix_tickets_loket_status_number', ['loket_id', 'status', 'number'], unique=False)
+        batch_op.create_index('ix_tickets_event_status', ['event_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tickets') as batch_op:
+        batch_op.drop_index('ix_tickets_event_status')
+        batch_op.drop_constraint('uq_tickets_loket_number', type_='unique')
+        batch_op.drop_index('ix_tickets_loket_status_number')
@@ -0,0 +1,47 @@
+"""add export jobs table
+
+Revision ID: a7d3e91c5f20
+Revises: f19c04b7e2a8
+Create Date: 2026-10-17 16:48:03.512907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e91c5f20'
+down_revision: Union[str, None] = 'f19c04b7e2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('export_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('params', sa.Text(), nullable=False),
+    sa.Column('dedup_key', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('rows_total', sa.Integer(), nullable=True),
+    sa.Column('rows_done', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('media_type', sa.String(length=50), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_export_jobs_status_created_at', 'export_jobs', ['status', 'created_at'], unique=False)
+    op.create_index('ix_export_jobs_dedup_key', 'export_jobs', ['dedup_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_export_jobs_dedup_key', table_name='export_jobs')
+    op.drop_index('ix_export_jobs_status_created_at', table_name='export_jobs')
+    op.drop_table('export_jobs')
@@ -0,0 +1,44 @@
+"""add per-event announcement seq
+
+Revision ID: b6e0f3d9a412
+Revises: a7d3e91c5f20
+Create Date: 2026-10-17 21:05:37.240118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e0f3d9a412'
+down_revision: Union[str, None] = 'a7d3e91c5f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('events', sa.Column('announcement_seq', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('announcements', sa.Column('seq', sa.Integer(), nullable=True))
+
+    # seq lama = id, counter event mulai dari seq terbesar yang sudah ada
+    op.execute("UPDATE announcements SET seq = id")
+    op.execute(
+        "UPDATE events SET announcement_seq = COALESCE((SELECT MAX(announcements.id) "
+        "FROM announcements WHERE announcements.event_id = events.id), 0)"
+    )
+
+    # batch: SQLite tidak bisa ALTER COLUMN, tabel dibuat ulang
+    with op.batch_alter_table('announcements') as batch_op:
+        batch_op.alter_column('seq', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_index('ix_announcements_event_id_id')
+        batch_op.create_index('uq_announcements_event_id_seq', ['event_id', 'seq'], unique=True)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('announcements') as batch_op:
+        batch_op.drop_index('uq_announcements_event_id_seq')
+        batch_op.create_index('ix_announcements_event_id_id', ['event_id', 'id'], unique=False)
+        batch_op.drop_column('seq')
+    op.drop_column('events', 'announcement_seq')
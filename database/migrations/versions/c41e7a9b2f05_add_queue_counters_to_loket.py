@@ -0,0 +1,37 @@
+"""add queue counters to loket
+
+Revision ID: c41e7a9b2f05
+Revises: 8b3f1c2a9d47
+Create Date: 2026-10-17 10:03:27.554120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a9b2f05'
+down_revision: Union[str, None] = '8b3f1c2a9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('lokets', sa.Column('waiting_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('lokets', sa.Column('hold_count', sa.Integer(), server_default='0', nullable=False))
+
+    # isi counter dari data tiket yang sudah ada
+    op.execute(
+        "UPDATE lokets SET "
+        "waiting_count = (SELECT COUNT(*) FROM tickets "
+        "WHERE tickets.loket_id = lokets.id AND tickets.status = 'waiting'), "
+        "hold_count = (SELECT COUNT(*) FROM tickets "
+        "WHERE tickets.loket_id = lokets.id AND tickets.status = 'hold')"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('lokets', 'hold_count')
+    op.drop_column('lokets', 'waiting_count')
@@ -0,0 +1,28 @@
+"""add attempt to export jobs
+
+Revision ID: c83a5f1e6d09
+Revises: b6e0f3d9a412
+Create Date: 2026-10-17 21:42:18.905316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c83a5f1e6d09'
+down_revision: Union[str, None] = 'b6e0f3d9a412'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # artefak lama bernama <id> tanpa attempt: job yang sudah selesai
+    # dibuat ulang saat diminta lagi, file lama dihapus oleh cleanup TTL
+    op.add_column('export_jobs', sa.Column('attempt', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('export_jobs', 'attempt')
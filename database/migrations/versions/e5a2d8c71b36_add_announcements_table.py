@@ -0,0 +1,36 @@
+"""add announcements table
+
+Revision ID: e5a2d8c71b36
+Revises: c41e7a9b2f05
+Create Date: 2026-10-17 13:41:09.208713
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a2d8c71b36'
+down_revision: Union[str, None] = 'c41e7a9b2f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('announcements',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('loket_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('number', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_announcements_event_id_id', 'announcements', ['event_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_announcements_event_id_id', table_name='announcements')
+    op.drop_table('announcements')
@@ -0,0 +1,30 @@
+"""add replica heartbeat table
+
+Revision ID: f19c04b7e2a8
+Revises: e5a2d8c71b36
+Create Date: 2026-10-17 15:22:48.617390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f19c04b7e2a8'
+down_revision: Union[str, None] = 'e5a2d8c71b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('replica_heartbeat',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('beat_ms', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('replica_heartbeat')
@@ -12,9 +12,17 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from src.config.settings import settings
-from src.config.database import init_database, close_database
+from src.config.database import init_database, close_database, pool_stats, replica_state
 from src.config.redis import close_redis
 from src.app.middleware.middleware import setup_cors_middleware, setup_custom_middleware 
+from src.app.services import redis_queue
+from src.app.services.announcements import trimmer
+from src.app.services.export_jobs import worker as export_worker
+from src.app.services.replica import monitor as replica_monitor
+from src.app.services.broadcast import broadcaster
+from src.app.services.metadata import metadata
+from src.app.services.state_cache import state_cache
+from src.app.services.versions import versions
 
 # Master data
 from src.app.api.events import router as events_router
@@ -22,6 +30,8 @@ from src.app.api.lokets import router as lokets_router
 from src.app.api.tickets import router as tickets_router
 from src.app.api.sound_source import router as sound_router
 from src.app.api.export import router as export_router
+from src.app.api.export_jobs import router as export_jobs_router
+from src.app.api.ws import router as ws_router
 
 # Setup logging
 logging.basicConfig(
@@ -48,11 +58,31 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.critical(f"Database initialization failed: {e}")
 
+    if redis_queue.enabled():
+        redis_queue.persister.start()
+        logger.info("Redis queue engine enabled")
+
+    broadcaster.start()
+    metadata.start()
+    versions.start()
+    trimmer.start()
+    replica_monitor.start()
+    if settings.export_worker_inline:
+        export_worker.start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down...")
     try:
+        await broadcaster.stop()
+        await metadata.stop()
+        await versions.stop()
+        await trimmer.stop()
+        await replica_monitor.stop()
+        await export_worker.stop()
+        if redis_queue.enabled():
+            await redis_queue.persister.stop()
         await close_database()
         await close_redis()
         logger.info("Cleanup completed")
@@ -73,12 +103,17 @@ setup_cors_middleware(app)
 setup_custom_middleware(app)
 
 
-# Include routers
+# Include routers (export dulu: /events/export dan /events/{id}/lokets/export
+# tidak boleh tertangkap /events/{event_id} dan /lokets/{loket_id})
+app.include_router(export_router, prefix="/api/v1")
 app.include_router(events_router, prefix="/api/v1")
 app.include_router(lokets_router, prefix="/api/v1")
 app.include_router(tickets_router, prefix="/api/v1")
 app.include_router(sound_router, prefix="/api/v1")
-app.include_router(export_router, prefix="/api/v1")
+app.include_router(export_jobs_router, prefix="/api/v1")
+
+# WebSocket display hub
+app.include_router(ws_router)
 
 
 @app.get("/")
@@ -105,6 +140,18 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """
+    Runtime counters of this worker
+    """
+    return {
+        "cache": state_cache.stats(),
+        "db_pool": pool_stats(),
+        "replica": replica_state.stats(),
+    }
+
+
 # Exception handlers
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -0,0 +1,198 @@
+"""
+Shared setup of the scripts/bench_*.py benchmarks that run the app
+in-process: the environment (a throwaway SQLite file unless
+--database-url, fakeredis unless --redis-url), bulk seeding and raw ASGI
+requests. configure() must run before anything from src/ or main is
+imported, because the settings are read at import time.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+API = "/api/v1"
+
+SEED_BATCH = 10_000
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--database-url", help="default: throwaway SQLite file")
+    parser.add_argument("--redis-url", help="default: fakeredis in-process")
+
+
+def configure(database_url: Optional[str] = None, redis_url: Optional[str] = None, **env: str) -> str:
+    """
+    Point the settings at the benchmark database / Redis; env overrides
+    further settings (e.g. SQLITE_MMAP_SIZE="0"). Returns the temp dir.
+    """
+    tmp = tempfile.mkdtemp(prefix="bench-")
+    os.environ.setdefault("SECRET_KEY", "bench")
+    os.environ.update(
+        DEBUG="false",
+        DATABASE_URL=database_url or f"sqlite:///{tmp}/queue.db",
+        LOG_LEVEL="WARNING",
+        LOG_DIR=tmp,
+        LOG_FILE=os.path.join(tmp, "app.log"),
+        EXPORT_DIR=os.path.join(tmp, "exports"),
+        QUEUE_ENGINE="database",
+        BROADCAST_BACKEND="memory",
+        CACHE_ENABLED="false",
+    )
+    os.environ.update(env)
+    if os.environ["DATABASE_URL"].startswith("sqlite"):
+        os.environ["DB_DRIVER"] = "sqlite"
+    os.environ.pop("READ_DATABASE_URL", None)
+    if redis_url:
+        os.environ["REDIS_URL"] = redis_url
+        return tmp
+
+    import fakeredis
+    import src.config.redis
+
+    # service meng-import redis_client saat import, jadi diganti lebih dulu
+    src.config.redis.redis_client = fakeredis.FakeAsyncRedis()
+    return tmp
+
+
+@asynccontextmanager
+async def app_client():
+    """
+    Create the tables, then yield an httpx client on the in-process app.
+    """
+    import httpx
+    from main import app
+    from src.config.database import close_database, init_database
+
+    await init_database()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=600) as client:
+            yield client
+    finally:
+        await close_database()
+
+
+async def seed_event(
+    lokets: int, tickets: int, statuses: Sequence[str] = ("waiting",)
+) -> Tuple[int, List[int]]:
+    """
+    Insert an event with lokets lokets and tickets tickets, dealt round
+    robin: ticket i goes to loket i % lokets with status
+    statuses[i // lokets % len(statuses)]. The loket counters match the
+    tickets. Returns (event_id, loket_ids).
+    """
+    from sqlalchemy import insert, select, update
+    from src.config.database import engine
+    from src.app.models.event import Event
+    from src.app.models.loket import Loket
+    from src.app.models.ticket import Ticket
+
+    now = datetime.utcnow()
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            insert(Event).values(name="Bench", code=uuid.uuid4().hex[:8], is_active=True)
+        )
+        event_id = result.inserted_primary_key[0]
+        await conn.execute(
+            insert(Loket),
+            [{"event_id": event_id, "name": f"Loket {i}", "code": str(i)} for i in range(lokets)],
+        )
+        result_ids = await conn.execute(
+            select(Loket.id).where(Loket.event_id == event_id).order_by(Loket.id)
+        )
+        loket_ids = result_ids.scalars().all()
+
+        # per loket: nomor terakhir, waiting, hold
+        counters = {loket_id: [0, 0, 0] for loket_id in loket_ids}
+        rows = []
+        for i in range(tickets):
+            loket_id = loket_ids[i % lokets]
+            status = statuses[i // lokets % len(statuses)]
+            counter = counters[loket_id]
+            counter[0] += 1
+            counter[1] += status == "waiting"
+            counter[2] += status == "hold"
+            rows.append({
+                "event_id": event_id,
+                "loket_id": loket_id,
+                "number": counter[0],
+                "status": status,
+                "created_at": now,
+                "called_at": None if status == "waiting" else now,
+            })
+            if len(rows) == SEED_BATCH:
+                await conn.execute(insert(Ticket), rows)
+                rows = []
+        if rows:
+            await conn.execute(insert(Ticket), rows)
+
+        for loket_id, (last, waiting, hold) in counters.items():
+            await conn.execute(
+                update(Loket)
+                .where(Loket.id == loket_id)
+                .values(last_ticket_number=last, waiting_count=waiting, hold_count=hold)
+            )
+    return event_id, loket_ids
+
+
+class Timing(NamedTuple):
+    status: int
+    ttfb: float
+    total: float
+    size: int
+
+
+async def asgi_get(app, path: str, query: str = "", headers: Sequence[Tuple[str, str]] = ()) -> Timing:
+    """
+    GET through the raw ASGI interface (no client buffering), timing the
+    first body byte and the end of the response.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")] + [(k.lower().encode(), v.encode()) for k, v in headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    requested = False
+    status = 0
+    first: Optional[float] = None
+    size = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # client tidak pernah disconnect
+        await asyncio.Future()
+
+    async def send(message):
+        nonlocal status, first, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if body and first is None:
+                first = time.perf_counter()
+            size += len(body)
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    end = time.perf_counter()
+    return Timing(status, (first or end) - start, end - start, size)
@@ -0,0 +1,88 @@
+"""
+Benchmark the embedded SQLite mode against MySQL on the same workloads
+(create ticket, next, mixed reads and calls; concurrency 1 and 10)
+through the in-process app. Each database runs in its own process,
+because the engine is built from the settings at import time:
+
+    python scripts/bench_embedded.py [--mysql-url mysql://user:pw@host/scratch_db]
+
+Without --mysql-url only the embedded mode runs. The MySQL database gets
+the tables created in it, so point it at a scratch database.
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+
+import _bench
+
+API = _bench.API
+
+
+async def run(client, name: str, requests, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call(request):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request()
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[call(request) for request in requests])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"  {name:22} {len(requests) / elapsed:6.0f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms")
+
+
+async def main(target: str, requests: int) -> None:
+    print(target)
+    async with _bench.app_client() as client:
+        event_id, loket_ids = await _bench.seed_event(10, 0)
+
+        def create(i):
+            url = f"{API}/events/{event_id}/lokets/{loket_ids[i % len(loket_ids)]}/tickets"
+            return lambda: client.post(url)
+
+        def next_ticket(i):
+            url = f"{API}/lokets/{loket_ids[i % len(loket_ids)]}/next"
+            return lambda: client.post(url)
+
+        def info(i):
+            url = f"{API}/lokets/{loket_ids[i % len(loket_ids)]}/info"
+            return lambda: client.get(url)
+
+        for concurrency in (1, 10):
+            await run(client, f"create ticket c={concurrency}", [create(i) for i in range(requests)], concurrency)
+        for concurrency in (1, 10):
+            await run(client, f"next c={concurrency}", [next_ticket(i) for i in range(requests)], concurrency)
+        mixed = [next_ticket(i) if i % 5 == 0 else info(i) for i in range(requests)]
+        await run(client, "8 GET + 2 next c=10", mixed, 10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--mysql-url")
+    # dipakai proses anak: satu database per proses
+    parser.add_argument("--target", choices=["embedded", "mysql"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.target is None:
+        targets = ["embedded"] + (["mysql"] if args.mysql_url else [])
+        for target in targets:
+            command = [sys.executable, __file__, "--target", target, "--requests", str(args.requests)]
+            if args.mysql_url:
+                command += ["--mysql-url", args.mysql_url]
+            subprocess.run(command, check=True)
+        sys.exit(0)
+
+    _bench.configure(args.mysql_url if args.target == "mysql" else None)
+    asyncio.run(main(args.target, args.requests))
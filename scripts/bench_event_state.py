@@ -0,0 +1,55 @@
+"""
+Benchmark GET /events/{id}/state for events with 1 to 500 lokets (every
+loket has 2 waiting tickets and 1 on hold): SQL statements per request
+and mean latency through the in-process app, with the state cache off:
+
+    python scripts/bench_event_state.py [--lokets 1,10,60,200,500] [--repeat 10]
+
+Run it on a checkout before and after a change to compare.
+"""
+import argparse
+import asyncio
+import time
+
+import _bench
+
+
+async def main(loket_counts, repeat: int) -> None:
+    from sqlalchemy import event
+    from src.config.database import engine, read_engine
+
+    statements = [0]
+
+    def on_statement(*args):
+        statements[0] += 1
+
+    targets = [engine.sync_engine] + ([read_engine.sync_engine] if read_engine is not None else [])
+    async with _bench.app_client() as client:
+        for target in targets:
+            event.listen(target, "before_cursor_execute", on_statement)
+
+        for lokets in loket_counts:
+            event_id, _ = await _bench.seed_event(lokets, lokets * 3, ("waiting", "waiting", "hold"))
+            url = f"{_bench.API}/events/{event_id}/state"
+            (await client.get(url)).raise_for_status()
+
+            statements[0] = 0
+            await client.get(url)
+            queries = statements[0]
+
+            start = time.perf_counter()
+            for _ in range(repeat):
+                await client.get(url)
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            print(f"{lokets:5} lokets  {queries:4} queries  {elapsed:8.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lokets", default="1,10,60,200,500")
+    parser.add_argument("--repeat", type=int, default=10)
+    _bench.add_arguments(parser)
+    args = parser.parse_args()
+
+    _bench.configure(args.database_url, args.redis_url)
+    asyncio.run(main([int(n) for n in args.lokets.split(",")], args.repeat))
@@ -0,0 +1,48 @@
+"""
+Benchmark the export formats on a ticket export: bytes on the wire, bytes
+per row and CPU seconds (all threads, so the gzip worker thread counts)
+per format, through the raw ASGI interface:
+
+    python scripts/bench_export_formats.py [--tickets 1000000]
+"""
+import argparse
+import asyncio
+import time
+
+import _bench
+
+FORMATS = ["csv", "csv.gz", "ndjson", "ndjson.gz"]
+
+STATUSES = ("done",) * 7 + ("called", "waiting", "hold")
+
+
+async def main(tickets: int, formats) -> None:
+    async with _bench.app_client():
+        from main import app
+
+        start = time.perf_counter()
+        event_id, _ = await _bench.seed_event(20, tickets, STATUSES)
+        print(f"seeded {tickets} tickets in {time.perf_counter() - start:.1f} s")
+
+        path = f"{_bench.API}/events/{event_id}/tickets/export"
+        print(f"{'format':10} {'wire':>10} {'B/row':>7} {'CPU s':>7} {'CPU s per 1M rows':>18}")
+        for format in formats:
+            cpu = time.process_time()
+            timing = await _bench.asgi_get(app, path, f"format={format}")
+            cpu = time.process_time() - cpu
+            assert timing.status == 200, timing.status
+            print(
+                f"{format:10} {timing.size / 1e6:7.1f} MB {timing.size / tickets:7.1f}"
+                f" {cpu:7.1f} {cpu / tickets * 1e6:18.1f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=FORMATS, action="append")
+    _bench.add_arguments(parser)
+    args = parser.parse_args()
+
+    _bench.configure(args.database_url, args.redis_url)
+    asyncio.run(main(args.tickets, args.format or FORMATS))
@@ -0,0 +1,82 @@
+"""
+Benchmark GET /events/{id}/tickets/export on an event with many tickets:
+time to first byte, total time and peak RSS growth, through the raw ASGI
+interface so nothing buffers the body:
+
+    python scripts/bench_export_stream.py [--tickets 500000] [--format csv]
+
+SQLITE_MMAP_SIZE=0 so mapped file pages do not count as RSS. Run it on
+a checkout before and after a change to compare.
+"""
+import argparse
+import asyncio
+import os
+import threading
+import time
+
+import _bench
+
+STATUSES = ("done",) * 7 + ("called", "waiting", "hold")
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class PeakRss:
+    """
+    Samples the resident set size in a thread (also while the event loop
+    is blocked) and keeps the peak.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, rss_bytes())
+            time.sleep(self.interval)
+
+    def __enter__(self) -> "PeakRss":
+        self.peak = rss_bytes()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+async def main(tickets: int, format: str) -> None:
+    async with _bench.app_client():
+        from main import app
+
+        start = time.perf_counter()
+        event_id, _ = await _bench.seed_event(20, tickets, STATUSES)
+        print(f"seeded {tickets} tickets in {time.perf_counter() - start:.1f} s")
+
+        baseline = rss_bytes()
+        with PeakRss() as rss:
+            timing = await _bench.asgi_get(
+                app, f"{_bench.API}/events/{event_id}/tickets/export", f"format={format}"
+            )
+        assert timing.status == 200, timing.status
+        print(
+            f"ttfb {timing.ttfb * 1000:8.0f} ms  total {timing.total:6.1f} s"
+            f"  {timing.size / 1e6:7.1f} MB  peak RSS +{(rss.peak - baseline) / 1e6:.0f} MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=500_000)
+    parser.add_argument("--format", default="csv")
+    _bench.add_arguments(parser)
+    args = parser.parse_args()
+
+    _bench.configure(args.database_url, args.redis_url, SQLITE_MMAP_SIZE="0")
+    asyncio.run(main(args.tickets, args.format))
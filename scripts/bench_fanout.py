@@ -0,0 +1,72 @@
+"""
+Benchmark the display hub fan-out: clients in-process subscribers of one
+event (half WebSocket, half SSE format), one message at a time, timed from
+delivery until each client task has received it. Measures the hub, not
+socket writes:
+
+    python scripts/bench_fanout.py [--clients 5000] [--messages 20]
+
+The redis backend relays through Redis pub/sub (fakeredis unless
+--redis-url), like with several uvicorn workers.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import _bench
+
+EVENT_ID = 1
+
+
+async def bench(backend: str, clients: int, messages: int) -> None:
+    from src.app.services.broadcast import Broadcaster
+
+    hub = Broadcaster(backend=backend)
+    hub.start()
+    subscribers = [
+        hub.subscribe(EVENT_ID, fmt="ws" if i % 2 else "sse") for i in range(clients)
+    ]
+    if backend == "redis":
+        # listener harus sudah subscribe sebelum publish pertama
+        await asyncio.sleep(0.2)
+
+    latencies = []
+    try:
+        for seq in range(messages):
+            sent = [0.0]
+
+            async def client(subscriber):
+                await subscriber.receive(timeout=30)
+                latencies.append(time.perf_counter() - sent[0])
+
+            tasks = [asyncio.create_task(client(s)) for s in subscribers]
+            await asyncio.sleep(0)
+            sent[0] = time.perf_counter()
+            await hub.announce(EVENT_ID, 1, f'{{"seq":{seq},"kind":"call","number":{seq}}}')
+            await asyncio.gather(*tasks)
+    finally:
+        await hub.stop()
+
+    latencies.sort()
+    print(
+        f"{backend:7} {clients} clients  p50 {statistics.median(latencies) * 1000:7.1f} ms"
+        f"  max {latencies[-1] * 1000:7.1f} ms"
+    )
+
+
+async def main(backends, clients: int, messages: int) -> None:
+    for backend in backends:
+        await bench(backend, clients, messages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--backend", choices=["memory", "redis"], action="append")
+    _bench.add_arguments(parser)
+    args = parser.parse_args()
+
+    _bench.configure(args.database_url, args.redis_url)
+    asyncio.run(main(args.backend or ["memory", "redis"], args.clients, args.messages))
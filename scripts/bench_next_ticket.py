@@ -0,0 +1,80 @@
+"""
+Benchmark POST /lokets/{id}/next with QUEUE_ENGINE=database and =redis.
+The app runs in-process (no HTTP server) against a throwaway SQLite file
+or --database-url, and fakeredis or --redis-url:
+
+    python scripts/bench_next_ticket.py [--tickets 2000] [--concurrency 20]
+
+Prints calls/s and p50 / p99 latency per engine, and for redis the time
+the persister needs to write the op log back. With fakeredis the redis
+numbers leave out the network round trips to a real Redis server.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import _bench
+
+API = _bench.API
+
+
+async def bench(client, engine: str, tickets: int, concurrency: int) -> None:
+    from src.config.settings import settings
+    from src.app.services import redis_queue
+
+    settings.queue_engine = engine
+
+    code = uuid.uuid4().hex[:8]
+    event_id = (await client.post(f"{API}/events", json={"name": "Bench", "code": code})).json()["id"]
+    loket = await client.post(f"{API}/events/{event_id}/lokets", json={"name": "Loket", "code": "A"})
+    loket_id = loket.json()["id"]
+    await client.post(
+        f"{API}/events/{event_id}/lokets/{loket_id}/tickets/bulk", json={"count": tickets}
+    )
+    if redis_queue.enabled():
+        await redis_queue.persister.flush(timeout=60)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def call_next():
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(f"{API}/lokets/{loket_id}/next")
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[call_next() for _ in range(tickets)])
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    line = f"{engine:8} {tickets / elapsed:8.0f} calls/s  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+
+    if redis_queue.enabled():
+        start = time.perf_counter()
+        await redis_queue.persister.flush(timeout=600)
+        line += f"  persist {time.perf_counter() - start:.2f} s"
+    print(line)
+
+
+async def main(tickets: int, concurrency: int, engines) -> None:
+    async with _bench.app_client() as client:
+        for engine in engines:
+            await bench(client, engine, tickets, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--engine", choices=["database", "redis"], action="append")
+    _bench.add_arguments(parser)
+    args = parser.parse_args()
+
+    _bench.configure(args.database_url, args.redis_url)
+    asyncio.run(main(args.tickets, args.concurrency, args.engine or ["database", "redis"]))
@@ -0,0 +1,78 @@
+"""
+Benchmark DB_POOL_CLASS=null against the queue pool: the loket info read
+(one session, one select) at concurrency 1 and 10 on an engine built with
+the app's pool options, counting connects per checkout:
+
+    python scripts/bench_pool.py [--requests 2000] [--database-url mysql://...]
+
+On the default SQLite file a connect is only a thread and a file open;
+against MySQL it also pays the TCP and auth handshake.
+"""
+import argparse
+import asyncio
+import time
+
+import _bench
+
+
+async def bench(pool_class: str, loket_ids, requests: int, concurrency: int) -> None:
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from src.config import database
+    from src.config.settings import settings
+    from src.app.models.loket import Loket
+    from src.app.services import records
+
+    settings.db_pool_class = pool_class
+    bench_engine = create_async_engine(settings.async_database_url, **database._engine_options())
+    connects = [0]
+
+    @event.listens_for(bench_engine.sync_engine, "connect")
+    def on_connect(*args):
+        connects[0] += 1
+
+    sessions = async_sessionmaker(bench_engine, class_=AsyncSession, expire_on_commit=False)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def read(i: int):
+        async with semaphore:
+            async with sessions() as session:
+                query = records.select_lokets().where(Loket.id == loket_ids[i % len(loket_ids)])
+                await records.fetch(session, query, records.LoketRecord)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*[read(i) for i in range(requests)])
+        elapsed = time.perf_counter() - start
+    finally:
+        await bench_engine.dispose()
+    print(
+        f"{pool_class:5} conc {concurrency:3}  {requests / elapsed:8.0f} reads/s"
+        f"  {connects[0]} connects for {requests} checkouts"
+    )
+
+
+async def main(requests: int, concurrency_levels) -> None:
+    from src.config.database import close_database, init_database
+    from src.app import models  # noqa: F401  (tabel didaftarkan ke Base)
+
+    await init_database()
+    try:
+        _, loket_ids = await _bench.seed_event(20, 200)
+    finally:
+        await close_database()
+
+    for concurrency in concurrency_levels:
+        for pool_class in ("null", "queue"):
+            await bench(pool_class, loket_ids, requests, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", default="1,10")
+    _bench.add_arguments(parser)
+    args = parser.parse_args()
+
+    _bench.configure(args.database_url, args.redis_url)
+    asyncio.run(main(args.requests, [int(n) for n in args.concurrency.split(",")]))
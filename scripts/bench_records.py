@@ -0,0 +1,98 @@
+"""
+Benchmark reading tickets as ORM objects against records (column
+projections, services/records.py), all at once and streamed: rows/s, and
+the peak Python heap (tracemalloc) in a second run, on the SQLite reader
+connection:
+
+    python scripts/bench_records.py [--tickets 1000000] [--chunk-size 1000]
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+import _bench
+
+
+async def orm_all(session, chunk_size: int) -> int:
+    from sqlalchemy import select
+    from src.app.models.ticket import Ticket
+
+    result = await session.execute(select(Ticket).order_by(Ticket.id))
+    return len(result.scalars().all())
+
+
+async def records_fetch(session, chunk_size: int) -> int:
+    from src.app.models.ticket import Ticket
+    from src.app.services import records
+
+    rows = await records.fetch(
+        session, records.select_tickets().order_by(Ticket.id), records.TicketRecord
+    )
+    return len(rows)
+
+
+async def orm_yield_per(session, chunk_size: int) -> int:
+    from sqlalchemy import select
+    from src.app.models.ticket import Ticket
+
+    result = await session.stream_scalars(
+        select(Ticket).order_by(Ticket.id).execution_options(yield_per=chunk_size)
+    )
+    count = 0
+    async for chunk in result.partitions():
+        # objek tidak disimpan (identity map hanya weak reference)
+        count += len(chunk)
+    return count
+
+
+async def records_stream(session, chunk_size: int) -> int:
+    from src.app.models.ticket import Ticket
+    from src.app.services import records
+
+    count = 0
+    async for chunk in records.stream(
+        session, records.select_tickets().order_by(Ticket.id), records.TicketRecord, chunk_size
+    ):
+        count += len(chunk)
+    return count
+
+
+READERS = [orm_all, records_fetch, orm_yield_per, records_stream]
+
+
+async def main(tickets: int, chunk_size: int) -> None:
+    async with _bench.app_client():
+        from src.config.database import ConsistentReadSessionLocal
+
+        start = time.perf_counter()
+        await _bench.seed_event(20, tickets, ("done", "called", "waiting"))
+        print(f"seeded {tickets} tickets in {time.perf_counter() - start:.1f} s")
+
+        for reader in READERS:
+            # rows/s tanpa tracemalloc (memperlambat beberapa kali lipat),
+            # heap di putaran kedua
+            async with ConsistentReadSessionLocal() as session:
+                start = time.perf_counter()
+                count = await reader(session, chunk_size)
+                elapsed = time.perf_counter() - start
+            async with ConsistentReadSessionLocal() as session:
+                tracemalloc.start()
+                await reader(session, chunk_size)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            print(
+                f"{reader.__name__:15} {count / elapsed / 1000:8.1f}k rows/s"
+                f"  peak heap {peak / 1e6:8.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    _bench.add_arguments(parser)
+    args = parser.parse_args()
+
+    _bench.configure(args.database_url, args.redis_url)
+    asyncio.run(main(args.tickets, args.chunk_size))
@@ -0,0 +1,134 @@
+"""
+Benchmark the hot ticket queries before and after the composite ticket
+indexes (revision 8b3f1c2a9d47) on a SQLite file seeded with millions of
+tickets. Prints EXPLAIN QUERY PLAN and the mean latency of each query:
+
+    python scripts/bench_ticket_indexes.py [--tickets 2000000] [--lokets 200]
+
+--fk-indexes adds single-column indexes on loket_id and event_id to the
+"before" table, like the ones MySQL creates for the foreign keys.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+STATUSES = ["done", "called", "waiting", "hold"]
+STATUS_WEIGHTS = [70, 10, 19, 1]
+
+LOKETS_PER_EVENT = 20
+
+# sama dengan model Ticket sebelum revision 8b3f1c2a9d47
+CREATE_TABLE = """
+CREATE TABLE tickets (
+    id INTEGER NOT NULL PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    loket_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    status VARCHAR(20),
+    created_at DATETIME,
+    called_at DATETIME
+)
+"""
+
+BEFORE_INDEXES = ["CREATE INDEX ix_tickets_id ON tickets (id)"]
+
+FK_INDEXES = [
+    "CREATE INDEX ix_tickets_loket_id ON tickets (loket_id)",
+    "CREATE INDEX ix_tickets_event_id ON tickets (event_id)",
+]
+
+# index dari revision 8b3f1c2a9d47
+AFTER_INDEXES = [
+    "CREATE UNIQUE INDEX uq_tickets_loket_number ON tickets (loket_id, number)",
+    "CREATE INDEX ix_tickets_loket_status_number ON tickets (loket_id, status, number)",
+    "CREATE INDEX ix_tickets_event_status ON tickets (event_id, status)",
+]
+
+# query yang dipakai endpoint antrian & export (lihat services/)
+QUERIES = {
+    "next_pop": (
+        "SELECT id FROM tickets WHERE loket_id = :loket AND status = 'waiting' "
+        "ORDER BY number LIMIT 1"
+    ),
+    "waiting_count": (
+        "SELECT count(id) FROM tickets WHERE loket_id = :loket AND status = 'waiting'"
+    ),
+    "hold_list": (
+        "SELECT number FROM tickets WHERE loket_id = :loket AND status = 'hold' "
+        "ORDER BY number"
+    ),
+    "export_event_status": (
+        "SELECT * FROM tickets WHERE event_id = :event AND status = 'hold' ORDER BY id"
+    ),
+}
+
+
+def seed(db: sqlite3.Connection, tickets: int, lokets: int) -> None:
+    rng = random.Random(6)
+    last_number = [0] * lokets
+
+    def rows():
+        for _ in range(tickets):
+            loket = rng.randrange(lokets)
+            last_number[loket] += 1
+            status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+            yield loket // LOKETS_PER_EVENT + 1, loket + 1, last_number[loket], status
+
+    db.executemany(
+        "INSERT INTO tickets (event_id, loket_id, number, status) VALUES (?, ?, ?, ?)", rows()
+    )
+    db.commit()
+
+
+def run(db: sqlite3.Connection, label: str, params: dict, repeat: int) -> None:
+    for name, query in QUERIES.items():
+        plan = " | ".join(row[-1] for row in db.execute("EXPLAIN QUERY PLAN " + query, params))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            db.execute(query, params).fetchall()
+        elapsed = (time.perf_counter() - start) / repeat * 1000
+        print(f"{label:6} {name:20} {elapsed:10.3f} ms  {plan}")
+
+
+def main(tickets: int, lokets: int, repeat: int, fk_indexes: bool, path: str) -> None:
+    if os.path.exists(path):
+        os.remove(path)
+    db = sqlite3.connect(path)
+    try:
+        db.execute(CREATE_TABLE)
+        for ddl in BEFORE_INDEXES + (FK_INDEXES if fk_indexes else []):
+            db.execute(ddl)
+
+        start = time.perf_counter()
+        seed(db, tickets, lokets)
+        db.execute("ANALYZE")
+        print(f"seeded {tickets} tickets over {lokets} lokets in {time.perf_counter() - start:.1f} s")
+
+        params = {"loket": lokets // 2 + 1, "event": (lokets // 2) // LOKETS_PER_EVENT + 1}
+        run(db, "before", params, repeat)
+
+        start = time.perf_counter()
+        for ddl in AFTER_INDEXES:
+            db.execute(ddl)
+        db.execute("ANALYZE")
+        print(f"created indexes in {time.perf_counter() - start:.1f} s")
+        run(db, "after", params, repeat)
+    finally:
+        db.close()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=2_000_000)
+    parser.add_argument("--lokets", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--fk-indexes", action="store_true")
+    parser.add_argument(
+        "--path", default=os.path.join(tempfile.gettempdir(), "bench_ticket_indexes.db")
+    )
+    args = parser.parse_args()
+    main(args.tickets, args.lokets, args.repeat, args.fk_indexes, args.path)
@@ -4,13 +4,15 @@ from .lokets import router as lokets_router
 from .tickets import router as tickets_router
 from .sound_source import router as sound_router
 from .export import router as export_router
+from .export_jobs import router as export_jobs_router
 
 # Create main API router
 api_router = APIRouter(prefix="/api/v1")
 
 # Include all routers
+api_router.include_router(export_router)
 api_router.include_router(events_router)
 api_router.include_router(lokets_router)
 api_router.include_router(tickets_router)
 api_router.include_router(sound_router)
-api_router.include_router(export_router)
+api_router.include_router(export_jobs_router)
@@ -1,15 +1,31 @@
-from typing import List
+import asyncio
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
 
-from src.config.database import get_database
+from src.config.database import (
+    fresh_session,
+    get_consistent_read_database,
+    get_database,
+    get_read_database,
+)
 from src.app.models.event import Event
 from src.app.models.loket import Loket
-from src.app.models.ticket import Ticket
+from src.app.models.announcement import Announcement
 from src.app.schema.event import EventCreate, EventRead, EventUpdate
-from src.app.schema.loket import LoketState
+from src.app.schema.loket import LoketRead, LoketState
+from src.app.schema.bootstrap import DisplayBootstrap
+from src.app.schema.announcement import AnnouncementRead
+from src.app.services import announcements, records
+from src.app.services.broadcast import broadcaster, sse_message, sse_stream, SSE_HEADERS
+from src.app.services.metadata import metadata
+from src.app.services.queue_state import build_loket_states, loket_states_adapter
+from src.app.services.sound import sound_config
+from src.app.services.state_cache import state_cache
+from src.app.services.versions import versions, make_etag, not_modified
 
 router = APIRouter(prefix="/events", tags=["events"])
 
@@ -30,21 +46,17 @@ async def create_event(
     ev = Event(name=payload.name, code=payload.code)
     db.add(ev)
     await db.commit()
-    await db.refresh(ev)
     return ev
 
 
 @router.get("", response_model=List[EventRead])
-async def list_events(db: AsyncSession = Depends(get_database)):
-    result = await db.execute(select(Event))
-    events = result.scalars().all()
-    return events
+async def list_events(db: AsyncSession = Depends(get_read_database)):
+    return await records.fetch(db, records.select_events(), records.EventRecord)
 
 
 @router.get("/{event_id}", response_model=EventRead)
-async def get_event(event_id: int, db: AsyncSession = Depends(get_database)):
-    result = await db.execute(select(Event).where(Event.id == event_id))
-    ev = result.scalar_one_or_none()
+async def get_event(event_id: int, db: AsyncSession = Depends(get_read_database)):
+    ev = await metadata.event(db, event_id)
     if not ev:
         raise HTTPException(status_code=404, detail="Event not found")
     return ev
@@ -81,9 +93,9 @@ async def update_event(
     if payload.is_active is not None:
         ev.is_active = payload.is_active
 
-    db.add(ev)
     await db.commit()
-    await db.refresh(ev)
+    await metadata.invalidate_event(event_id)
+    await versions.bump(event_id)
     return ev
 
 
@@ -108,57 +120,158 @@ async def delete_event(event_id: int, db: AsyncSession = Depends(get_database)):
 
     await db.delete(ev)
     await db.commit()
+    await metadata.invalidate_event(event_id)
+    await versions.bump(event_id)
     return
 
 
 @router.get("/{event_id}/state", response_model=List[LoketState])
-async def event_state(event_id: int, db: AsyncSession = Depends(get_database)):
-    result_event = await db.execute(
-        select(Event).where(Event.id == event_id)
-    )
-    ev = result_event.scalar_one_or_none()
-    if not ev:
-        raise HTTPException(status_code=404, detail="Event not found")
+async def event_state(
+    event_id: int,
+    request: Request,
+    wait: float = Query(0, ge=0, le=60, description="Long-poll: tunggu maksimal sekian detik"),
+    since: Optional[int] = Query(None, description="Versi terakhir yang dimiliki client (X-State-Version)"),
+    db: AsyncSession = Depends(get_read_database),
+):
+    """
+    State semua loket. Dengan ?wait=N&since=<versi>, request ditahan sampai
+    versi berubah dari since (atau N detik lewat), untuk display yang tidak
+    bisa SSE/WebSocket.
+    """
+    if wait and since is not None:
+        if await metadata.event(db, event_id) is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        # koneksi DB tidak ditahan selama menunggu
+        await db.close()
+        version = await versions.wait(event_id, since, wait)
+    else:
+        # versi dibaca sebelum data: perubahan di antaranya paling buruk
+        # membuat poll berikutnya mendapat 200 lagi, tidak pernah data basi
+        version = await versions.get(event_id)
 
-    result_lokets = await db.execute(
-        select(Loket).where(Loket.event_id == event_id)
-    )
-    lokets = result_lokets.scalars().all()
+    etag = make_etag(version)
+    headers = {"ETag": etag, "X-State-Version": str(version)}
+    cached = not_modified(request, etag)
+    if cached:
+        cached.headers.update(headers)
+        return cached
 
-    states: List[LoketState] = []
+    async def load() -> bytes:
+        # replica yang belum sampai versi ini tidak boleh mengisi cache
+        async with fresh_session(db, version) as session:
+            if await metadata.event(session, event_id) is None:
+                raise HTTPException(status_code=404, detail="Event not found")
+            states = await build_loket_states(session, event_id)
+        return loket_states_adapter.dump_json(states)
 
-    for loket in lokets:
-        result_count = await db.execute(
-            select(func.count(Ticket.id)).where(
-                Ticket.loket_id == loket.id,
-                Ticket.status == "waiting",
-            )
-        )
-        waiting_count = result_count.scalar_one() or 0
-
-        # ambil nomor tiket yang statusnya HOLD
-        result_hold = await db.execute(
-            select(Ticket.number)
-            .where(
-                Ticket.loket_id == loket.id,
-                Ticket.status == "hold",
+    body = await state_cache.fetch(f"event:{event_id}:state", version, load)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{event_id}/bootstrap", response_model=DisplayBootstrap)
+async def event_bootstrap(
+    event_id: int,
+    request: Request,
+    role: str = Query(..., description="Halaman role, misal: multi_display, multi_display_led, loket_display, loket_display_led, loket_admin"),
+    db: AsyncSession = Depends(get_read_database),
+):
+    """
+    Semua yang dibutuhkan display saat boot dalam 1 request: event, daftar
+    loket, state, konfigurasi suara untuk role dan versi. Di-cache sebagai
+    satu kesatuan per versi event.
+    """
+    version = await versions.get(event_id)
+    etag = make_etag(version)
+    headers = {"ETag": etag, "X-State-Version": str(version)}
+    cached = not_modified(request, etag)
+    if cached:
+        cached.headers.update(headers)
+        return cached
+
+    async def load() -> bytes:
+        async with fresh_session(db, version) as session:
+            ev = await metadata.event(session, event_id)
+            if ev is None:
+                raise HTTPException(status_code=404, detail="Event not found")
+
+            lokets = await records.fetch(
+                session,
+                records.select_lokets().where(Loket.event_id == event_id).order_by(Loket.id),
+                records.LoketRecord,
             )
-            .order_by(Ticket.number)
-        )
-        hold_numbers = [row[0] for row in result_hold.all()]
-
-        states.append(
-            LoketState(
-                loket_id=loket.id,
-                loket_code=loket.code,
-                loket_name=loket.name,
-                loket_description=loket.description,
-                current_number=loket.current_number or 0,
-                queue_length=waiting_count,
-                last_ticket_number=loket.last_ticket_number or 0,
-                last_repeat_at=loket.last_repeat_at,
-                hold_numbers=hold_numbers,
+            result_seq = await session.execute(
+                select(func.max(Announcement.seq)).where(Announcement.event_id == event_id)
             )
-        )
 
-    return states
+            return DisplayBootstrap(
+                version=version,
+                event=EventRead.model_validate(ev),
+                lokets=[LoketRead.model_validate(loket) for loket in lokets],
+                state=await build_loket_states(session, event_id, lokets=lokets),
+                sound=await sound_config(session, event_id, role),
+                last_announcement_seq=result_seq.scalar_one(),
+            ).model_dump_json().encode()
+
+    body = await state_cache.fetch(f"event:{event_id}:bootstrap:{role}", version, load)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{event_id}/announcements", response_model=List[AnnouncementRead])
+async def event_announcements(
+    event_id: int,
+    after: Optional[int] = Query(None, ge=0, description="Seq terakhir yang sudah diterima client"),
+    limit: int = Query(100, ge=1, le=500),
+    wait: float = Query(0, ge=0, le=60, description="Long-poll: tunggu maksimal sekian detik"),
+    db: AsyncSession = Depends(get_read_database),
+):
+    """
+    Antrian announcement (call, repeat, call_held) dengan seq naik terus.
+    Tanpa after: announcement terbaru. Dengan ?after=N&wait=S request
+    ditahan sampai ada announcement baru atau S detik lewat.
+    """
+    if await metadata.event(db, event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    # versi dibaca sebelum query supaya announcement baru tidak terlewat
+    version = await versions.get(event_id)
+    async with fresh_session(db, version) as session:
+        items = await announcements.fetch(session, event_id, after, limit)
+    while not items and after is not None and loop.time() < deadline:
+        # koneksi DB tidak ditahan selama menunggu
+        await db.close()
+        version = await versions.wait(event_id, version, deadline - loop.time())
+        async with fresh_session(db, version) as session:
+            items = await announcements.fetch(session, event_id, after, limit)
+    return items
+
+
+@router.get("/{event_id}/stream")
+async def event_stream(
+    event_id: int, db: AsyncSession = Depends(get_consistent_read_database)
+):
+    """
+    Server-Sent Events untuk display: snapshot state semua loket saat
+    connect (event: snapshot), lalu state loket yang berubah (event: loket).
+    """
+    if await metadata.event(db, event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    # subscribe dulu supaya perubahan selama snapshot tidak terlewat
+    subscriber = broadcaster.subscribe(event_id)
+    try:
+        states = await build_loket_states(db, event_id)
+    except Exception:
+        broadcaster.unsubscribe(subscriber)
+        raise
+    snapshot = loket_states_adapter.dump_json(states).decode()
+
+    # koneksi DB tidak ditahan selama stream terbuka
+    await db.close()
+
+    return StreamingResponse(
+        sse_stream(subscriber, sse_message("snapshot", snapshot)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_consistent_read_database, get_database
+from src.app.schema.export_job import ExportJobCreate, ExportJobRead
+from src.app.services import export_jobs, exports
+
+router = APIRouter(prefix="/exports", tags=["export"])
+
+
+@router.post("", response_model=ExportJobRead, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    payload: ExportJobCreate,
+    db: AsyncSession = Depends(get_database),
+):
+    """
+    Export di background (jenis sama dengan endpoint /export). Poll
+    GET /exports/{id} sampai status "done", lalu download. Export yang sama
+    yang masih jalan / baru selesai dipakai ulang (reused=true).
+    """
+    if payload.kind in ("lokets", "tickets", "all") and payload.event_id is None:
+        raise HTTPException(status_code=422, detail="event_id is required")
+    if payload.kind == "loket_tickets" and payload.loket_id is None:
+        raise HTTPException(status_code=422, detail="loket_id is required")
+
+    detail = await exports.missing(
+        db, payload.kind, event_id=payload.event_id, loket_id=payload.loket_id
+    )
+    if detail:
+        raise HTTPException(status_code=404, detail=detail)
+
+    # hanya parameter yang dipakai jenis export ini (kunci dedup)
+    params = {
+        "events": {},
+        "lokets": {"event_id": payload.event_id},
+        "tickets": {
+            "event_id": payload.event_id,
+            "loket_id": payload.loket_id,
+            "status": payload.status,
+        },
+        "loket_tickets": {"loket_id": payload.loket_id, "status": payload.status},
+        "all": {"event_id": payload.event_id},
+    }[payload.kind]
+    params["format"] = payload.format
+
+    job, reused = await export_jobs.submit(db, payload.kind, params)
+    return export_jobs.to_read(job, reused=reused)
+
+
+@router.get("/{job_id}", response_model=ExportJobRead)
+async def get_export_job(
+    job_id: str, db: AsyncSession = Depends(get_consistent_read_database)
+):
+    job = await export_jobs.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return export_jobs.to_read(job)
+
+
+@router.get("/{job_id}/download")
+async def download_export_job(
+    job_id: str, db: AsyncSession = Depends(get_consistent_read_database)
+):
+    job = await export_jobs.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+
+    return FileResponse(
+        export_jobs.artifact_path(job),
+        media_type=job.media_type,
+        filename=job.filename,
+    )
@@ -2,13 +2,16 @@ from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete
+from sqlalchemy import select, delete
 
-from src.config.database import get_database
-from src.app.models.event import Event
+from src.config.database import get_database, get_read_database
 from src.app.models.loket import Loket
 from src.app.models.ticket import Ticket
 from src.app.schema.loket import LoketCreate, LoketRead, LoketUpdate
+from src.app.services import records, redis_queue
+from src.app.services.broadcast import broadcaster
+from src.app.services.metadata import metadata
+from src.app.services.versions import versions
 
 router = APIRouter(prefix="/events/{event_id}/lokets", tags=["lokets"])
 
@@ -19,9 +22,7 @@ async def create_loket(
     payload: LoketCreate,
     db: AsyncSession = Depends(get_database),
 ):
-    result = await db.execute(select(Event).where(Event.id == event_id))
-    ev = result.scalar_one_or_none()
-    if not ev:
+    if await metadata.event(db, event_id) is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
     loket = Loket(
@@ -32,33 +33,29 @@ async def create_loket(
     )
     db.add(loket)
     await db.commit()
-    await db.refresh(loket)
+    await versions.bump(event_id)
     return loket
 
 
 @router.get("", response_model=List[LoketRead])
 async def list_lokets(
-    event_id: int, db: AsyncSession = Depends(get_database)
+    event_id: int, db: AsyncSession = Depends(get_read_database)
 ):
-    result_event = await db.execute(
-        select(Event).where(Event.id == event_id)
-    )
-    ev = result_event.scalar_one_or_none()
-    if not ev:
+    if await metadata.event(db, event_id) is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    result_lokets = await db.execute(
-        select(Loket).where(Loket.event_id == event_id)
+    return await records.fetch(
+        db,
+        records.select_lokets().where(Loket.event_id == event_id),
+        records.LoketRecord,
     )
-    lokets = result_lokets.scalars().all()
-    return lokets
 
 
 @router.get("/{loket_id}", response_model=LoketRead)
 async def get_loket(
     event_id: int,
     loket_id: int,
-    db: AsyncSession = Depends(get_database),
+    db: AsyncSession = Depends(get_read_database),
 ):
     result = await db.execute(
         select(Loket).where(
@@ -96,9 +93,9 @@ async def update_loket(
     if payload.description is not None:
         loket.description = payload.description
 
-    db.add(loket)
     await db.commit()
-    await db.refresh(loket)
+    await metadata.invalidate_loket(loket_id)
+    await versions.bump(event_id)
     return loket
 
 
@@ -108,6 +105,11 @@ async def delete_loket(
     loket_id: int,
     db: AsyncSession = Depends(get_database),
 ):
+    # status tiket di mode redis di-update write-behind: masukkan dulu op
+    # yang tertunda (sebelum query pertama, lihat reset_loket)
+    if redis_queue.enabled():
+        await redis_queue.persister.flush()
+
     result = await db.execute(
         select(Loket).where(
             Loket.id == loket_id,
@@ -118,16 +120,18 @@ async def delete_loket(
     if not loket:
         raise HTTPException(status_code=404, detail="Loket not found")
 
-    # Cek apakah masih ada tiket waiting di loket ini
+    # Cek apakah masih ada tiket waiting di loket ini. Dari tabel tickets,
+    # bukan counter waiting_count yang bisa tertinggal dari baris tiket
     result_waiting = await db.execute(
-        select(func.count(Ticket.id)).where(
+        select(Ticket.id)
+        .where(
             Ticket.loket_id == loket_id,
             Ticket.status == "waiting",
         )
+        .limit(1)
     )
-    waiting_count = result_waiting.scalar_one() or 0
 
-    if waiting_count > 0:
+    if result_waiting.first() is not None:
         raise HTTPException(
             status_code=400,
             detail=(
@@ -138,6 +142,11 @@ async def delete_loket(
 
     await db.delete(loket)
     await db.commit()
+
+    if redis_queue.enabled():
+        await redis_queue.forget(loket_id)
+    await metadata.invalidate_loket(loket_id)
+    await versions.bump(event_id)
     return
 
 
@@ -152,7 +161,14 @@ async def reset_loket(
     - Hapus semua tiket
     - Set current_number = 0
     - Set last_ticket_number = 0
+    - Set waiting_count = hold_count = 0
     """
+    # pastikan op write-behind yang tertunda sudah masuk DB dulu. Harus
+    # sebelum query pertama session ini: persister pakai session sendiri,
+    # dan di mode SQLite hanya ada satu koneksi writer
+    if redis_queue.enabled():
+        await redis_queue.persister.flush()
+
     result = await db.execute(
         select(Loket).where(
             Loket.id == loket_id,
@@ -170,9 +186,14 @@ async def reset_loket(
 
     loket.current_number = 0
     loket.last_ticket_number = 0
+    loket.waiting_count = 0
+    loket.hold_count = 0
 
-    db.add(loket)
     await db.commit()
-    await db.refresh(loket)
+
+    if redis_queue.enabled():
+        await redis_queue.forget(loket_id)
+    await versions.bump(event_id)
+    await broadcaster.loket_changed(event_id, loket_id)
 
     return {"message": "Antrian di loket ini berhasil direset."}
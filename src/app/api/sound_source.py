@@ -1,51 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from typing import Optional
 
-from src.config.database import get_database
+from src.config.database import get_database, get_read_database, fresh_session
 from src.app.models.sound_source import SoundSource
-from src.app.models.event import Event
 from src.app.schema.sound_source import SoundSourceConfig, SoundConfigUpdate, SoundConfigAll
+from src.app.services.metadata import metadata
+from src.app.services.sound import sound_config
+from src.app.services.versions import versions, make_etag, not_modified
 
 router = APIRouter(tags=["sound"])
 
 @router.get("/events/{event_id}/sound-config", response_model=SoundSourceConfig)
 async def get_sound_config(
     event_id: int,
+    request: Request,
+    response: Response,
     role: str = Query(..., description="Halaman role, misal: multi_display, multi_display_led, loket_display, loket_display_led, loket_admin"),
-    db: AsyncSession = Depends(get_database),
+    db: AsyncSession = Depends(get_read_database),
 ):
-    # pastikan event ada
-    result_event = await db.execute(select(Event).where(Event.id == event_id))
-    event = result_event.scalar_one_or_none()
-    if not event:
-      raise HTTPException(status_code=404, detail="Event not found")
-
+    version = await versions.get(event_id)
+    etag = make_etag(version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
 
-    # kalau tidak ada spesifik → pakai default per event
-    result_default = await db.execute(
-        select(SoundSource).where(
-            SoundSource.event_id == event_id,
-            SoundSource.role == role,
-        )
-    )
-    default = result_default.scalar_one_or_none()
+    async with fresh_session(db, version) as session:
+        # pastikan event ada (event & konfigurasi suara dari cache metadata)
+        if await metadata.event(session, event_id) is None:
+          raise HTTPException(status_code=404, detail="Event not found")
 
-    if default:
-        enabled = default.enabled
-    else:
-        # fallback: misal default suara ON di display, OFF di admin
-        if role in ("multi_display", "loket_display"):
-            enabled = True
-        else:
-            enabled = False
-
-    return SoundSourceConfig(
-        event_id=event_id,
-        role=role,
-        enabled=enabled,
-    )
+        return await sound_config(session, event_id, role)
 
 
 @router.put("/events/{event_id}/sound-config", response_model=SoundConfigAll)
@@ -55,9 +41,7 @@ async def update_sound_config(
     db: AsyncSession = Depends(get_database),
 ):
     # pastikan event ada
-    result_event = await db.execute(select(Event).where(Event.id == event_id))
-    event = result_event.scalar_one_or_none()
-    if not event:
+    if await metadata.event(db, event_id) is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
     # mapping role -> enabled dari body
@@ -89,6 +73,8 @@ async def update_sound_config(
         db.add(record)
 
     await db.commit()
+    await metadata.invalidate_sound(event_id)
+    await versions.bump(event_id)
 
     return SoundConfigAll(
         event_id=event_id,
@@ -1,21 +1,77 @@
 from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, insert, update
 
-from src.config.database import get_database
+from src.config.database import (
+    fresh_session,
+    get_consistent_read_database,
+    get_database,
+    get_read_database,
+)
 
 from src.app.models.loket import Loket
 from src.app.models.ticket import Ticket
-
-from src.app.schema.ticket import TicketCreateResponse, NextTicketResponse
+from src.app.models.announcement import Announcement
+from src.app.services import announcements, records, redis_queue
+from src.app.services.broadcast import broadcaster, sse_message, sse_stream, SSE_HEADERS
+from src.app.services.queue import (
+    allocate_ticket_number,
+    claim_next_ticket,
+    claim_next_tickets,
+    apply_claims,
+)
+from src.app.services.queue_state import build_loket_states
+from src.app.services.metadata import metadata, EventMeta, LoketMeta
+from src.app.services.state_cache import state_cache
+from src.app.services.versions import versions, make_etag, not_modified
+
+from src.app.schema.ticket import (
+    TicketCreateResponse,
+    TicketBulkCreate,
+    TicketBulkCreateResponse,
+    NextTicketResponse,
+    BatchNextRequest,
+)
 from src.app.schema.loket import LoketInfo
 
 router = APIRouter(tags=["tickets"])
 
 
+async def _reserve_numbers(
+    db: AsyncSession,
+    event_id: int,
+    loket_id: int,
+    count: int = 1,
+) -> Tuple[int, LoketMeta, EventMeta]:
+    """
+    Reserve count ticket numbers for a loket. Returns the last reserved
+    number plus the loket and event metadata; raises 404 if the loket is
+    not in the event.
+    """
+    # nomor dialokasikan atomik (di Redis atau di database),
+    # aman untuk request paralel
+    if redis_queue.enabled():
+        loket = await metadata.loket(db, loket_id)
+        if loket is None or loket.event_id != event_id:
+            raise HTTPException(status_code=404, detail="Loket not found")
+        last_number = await redis_queue.allocate_number(db, loket_id, count)
+        if last_number is None:
+            # metadata dari cache, loket bisa sudah dihapus
+            raise HTTPException(status_code=404, detail="Loket not found")
+    else:
+        last_number = await allocate_ticket_number(db, loket_id, event_id, count)
+        if last_number is None:
+            raise HTTPException(status_code=404, detail="Loket not found")
+        loket = await metadata.loket(db, loket_id)
+
+    event = await metadata.event(db, event_id)
+    return last_number, loket, event
+
+
 @router.post(
     "/events/{event_id}/lokets/{loket_id}/tickets",
     response_model=TicketCreateResponse,
@@ -25,20 +81,7 @@ async def create_ticket(
     loket_id: int,
     db: AsyncSession = Depends(get_database),
 ):
-    result = await db.execute(
-        select(Loket)
-        .options(selectinload(Loket.event))
-        .where(
-            Loket.id == loket_id,
-            Loket.event_id == event_id,
-        )
-    )
-    loket = result.scalar_one_or_none()
-    if not loket:
-        raise HTTPException(status_code=404, detail="Loket not found")
-
-    new_number = (loket.last_ticket_number or 0) + 1
-    loket.last_ticket_number = new_number
+    new_number, loket, event = await _reserve_numbers(db, event_id, loket_id)
 
     ticket = Ticket(
         event_id=event_id,
@@ -48,105 +91,312 @@ async def create_ticket(
     )
 
     db.add(ticket)
-    db.add(loket)
     await db.commit()
-    await db.refresh(ticket)
-    await db.refresh(loket)
+
+    if redis_queue.enabled():
+        await redis_queue.enqueue(loket_id, new_number, new_number)
+    await versions.bump(event_id)
+    await broadcaster.loket_changed(event_id, loket_id)
 
     return TicketCreateResponse(
         ticket_id=ticket.id,
-        loket_id=loket.id,
+        loket_id=loket_id,
         loket_name=loket.name,
         loket_description=loket.description,
         loket_code=loket.code,
         event_id=event_id,
-        event_name=loket.event.name,
-        number=ticket.number,
+        event_name=event.name,
+        number=new_number,
     )
 
 
-@router.post("/lokets/{loket_id}/next", response_model=NextTicketResponse)
-async def next_ticket(
+@router.post(
+    "/events/{event_id}/lokets/{loket_id}/tickets/bulk",
+    response_model=TicketBulkCreateResponse,
+)
+async def create_tickets_bulk(
+    event_id: int,
     loket_id: int,
+    payload: TicketBulkCreate,
     db: AsyncSession = Depends(get_database),
 ):
-    result = await db.execute(
-        select(Loket).where(Loket.id == loket_id)
+    """
+    Terbitkan banyak tiket sekaligus: 1 rentang nomor berurutan,
+    1 multi-row insert, 1 transaksi.
+    """
+    last_number, loket, event = await _reserve_numbers(
+        db, event_id, loket_id, payload.count
     )
-    loket = result.scalar_one_or_none()
-    if not loket:
-        raise HTTPException(status_code=404, detail="Loket not found")
+    first_number = last_number - payload.count + 1
+
+    await db.execute(
+        insert(Ticket),
+        [
+            {
+                "event_id": event_id,
+                "loket_id": loket_id,
+                "number": number,
+                "status": "waiting",
+            }
+            for number in range(first_number, last_number + 1)
+        ],
+    )
+    await db.commit()
 
-    # ambil tiket waiting paling kecil nomornya
-    result_ticket = await db.execute(
-        select(Ticket)
-        .where(
-            Ticket.loket_id == loket_id,
-            Ticket.status == "waiting",
-        )
-        .order_by(Ticket.number)
-        .limit(1)
+    if redis_queue.enabled():
+        await redis_queue.enqueue(loket_id, first_number, last_number)
+    await versions.bump(event_id)
+    await broadcaster.loket_changed(event_id, loket_id)
+
+    return TicketBulkCreateResponse(
+        loket_id=loket_id,
+        loket_name=loket.name,
+        loket_code=loket.code,
+        event_id=event_id,
+        event_name=event.name,
+        count=payload.count,
+        first_number=first_number,
+        last_number=last_number,
     )
-    ticket = result_ticket.scalar_one_or_none()
 
-    if not ticket:
+
+@router.post("/lokets/{loket_id}/next", response_model=NextTicketResponse)
+async def next_ticket(
+    loket_id: int,
+    db: AsyncSession = Depends(get_database),
+):
+    if redis_queue.enabled():
+        loket = await metadata.loket(db, loket_id)
+        if loket is None:
+            raise HTTPException(status_code=404, detail="Loket not found")
+        loket_code, event_id = loket.code, loket.event_id
+
+        called_number = await redis_queue.pop_next(db, loket_id)
+        if called_number is not None:
+            announcement = await announcements.record(
+                db, event_id, loket_id, "call", called_number
+            )
+            await db.commit()
+            await versions.bump(event_id)
+            await broadcaster.loket_changed(event_id, loket_id)
+            await announcements.publish([announcement])
         return NextTicketResponse(
-            loket_id=loket.id,
-            loket_code=loket.code,
+            loket_id=loket_id,
+            loket_code=loket_code,
+            called_number=called_number,
+            message=(
+                "Memanggil nomor antrian."
+                if called_number is not None
+                else "Tidak ada antrian."
+            ),
+        )
+
+    # klaim tiket waiting paling kecil nomornya (terkunci, tanpa double-claim)
+    called_number = await claim_next_ticket(db, loket_id)
+
+    loket = await metadata.loket(db, loket_id)
+    if loket is None:
+        raise HTTPException(status_code=404, detail="Loket not found")
+    loket_code, event_id = loket.code, loket.event_id
+
+    if called_number is None:
+        return NextTicketResponse(
+            loket_id=loket_id,
+            loket_code=loket_code,
             called_number=None,
             message="Tidak ada antrian.",
         )
 
-    ticket.status = "called"
-    ticket.called_at = datetime.now(timezone.utc)
-    loket.current_number = ticket.number
-
-    db.add(ticket)
-    db.add(loket)
+    await apply_claims(db, {loket_id: called_number})
+    announcement = await announcements.record(
+        db, event_id, loket_id, "call", called_number
+    )
     await db.commit()
-    await db.refresh(ticket)
-    await db.refresh(loket)
+    await versions.bump(event_id)
+    await broadcaster.loket_changed(event_id, loket_id)
+    await announcements.publish([announcement])
 
     return NextTicketResponse(
-        loket_id=loket.id,
-        loket_code=loket.code,
-        called_number=ticket.number,
+        loket_id=loket_id,
+        loket_code=loket_code,
+        called_number=called_number,
         message="Memanggil nomor antrian.",
     )
 
 
+def _check_lokets_found(lokets, expected_ids: Optional[List[int]]) -> None:
+    if expected_ids is None or len(lokets) == len(expected_ids):
+        return
+    found = {row.id for row in lokets}
+    missing = [loket_id for loket_id in expected_ids if loket_id not in found]
+    raise HTTPException(status_code=404, detail=f"Loket not found: {missing}")
+
+
+async def _next_tickets(
+    db: AsyncSession,
+    loket_filter,
+    expected_ids: Optional[List[int]] = None,
+) -> Tuple[List[NextTicketResponse], List[Tuple[int, int]], List[Announcement]]:
+    """
+    Call the next waiting ticket on every loket matched by loket_filter
+    (a list of ids or a select of ids). Does not commit.
+    Returns the responses, the (event_id, loket_id) pairs that changed and
+    the announcements to publish after the commit.
+    """
+    lokets_query = (
+        select(Loket.id, Loket.code, Loket.event_id)
+        .where(Loket.id.in_(loket_filter))
+        .order_by(Loket.id)
+    )
+
+    if redis_queue.enabled():
+        lokets = (await db.execute(lokets_query)).all()
+        _check_lokets_found(lokets, expected_ids)
+        called: Dict[int, int] = {}
+        for row in lokets:
+            number = await redis_queue.pop_next(db, row.id)
+            if number is not None:
+                called[row.id] = number
+    else:
+        # klaim dulu (set-based), baru baca loket
+        called = await claim_next_tickets(db, loket_filter)
+        lokets = (await db.execute(lokets_query)).all()
+        _check_lokets_found(lokets, expected_ids)
+        await apply_claims(db, called)
+
+    results = [
+        NextTicketResponse(
+            loket_id=row.id,
+            loket_code=row.code,
+            called_number=called.get(row.id),
+            message=(
+                "Memanggil nomor antrian."
+                if row.id in called
+                else "Tidak ada antrian."
+            ),
+        )
+        for row in lokets
+    ]
+    changed = [(row.event_id, row.id) for row in lokets if row.id in called]
+    # urut per event: row lock event diambil dalam urutan yang sama
+    # oleh semua transaksi batch, jadi tidak saling deadlock
+    announced = [
+        await announcements.record(db, event_id, loket_id, "call", called[loket_id])
+        for event_id, loket_id in sorted(changed)
+    ]
+    return results, changed, announced
+
+
+@router.post("/lokets/next", response_model=List[NextTicketResponse])
+async def next_ticket_batch(
+    payload: BatchNextRequest,
+    db: AsyncSession = Depends(get_database),
+):
+    """
+    Panggil nomor berikutnya di banyak loket sekaligus dalam 1 transaksi.
+    """
+    loket_ids = sorted(set(payload.loket_ids))
+    results, changed, announced = await _next_tickets(
+        db, loket_ids, expected_ids=loket_ids
+    )
+    await db.commit()
+
+    for event_id, loket_id in changed:
+        await versions.bump(event_id)
+        await broadcaster.loket_changed(event_id, loket_id)
+    await announcements.publish(announced)
+    return results
+
+
+@router.post("/events/{event_id}/next", response_model=List[NextTicketResponse])
+async def next_ticket_event(
+    event_id: int,
+    db: AsyncSession = Depends(get_database),
+):
+    """
+    Panggil nomor berikutnya di semua loket milik event dalam 1 transaksi.
+    """
+    results, changed, announced = await _next_tickets(
+        db, select(Loket.id).where(Loket.event_id == event_id)
+    )
+    if not results and await metadata.event(db, event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    await db.commit()
+
+    if changed:
+        await versions.bump(event_id)
+    for _, loket_id in changed:
+        await broadcaster.loket_changed(event_id, loket_id)
+    await announcements.publish(announced)
+    return results
+
+
 @router.get("/lokets/{loket_id}/info", response_model=LoketInfo)
 async def loket_info(
     loket_id: int,
-    db: AsyncSession = Depends(get_database),
+    request: Request,
+    db: AsyncSession = Depends(get_read_database),
 ):
+    # versi event dibaca sebelum data; event loket dari cache metadata
+    # (juga terisi dari replica), sehingga 304 tidak menyentuh database
+    event_id = await metadata.loket_event_id(db, loket_id)
+    if event_id is None:
+        raise HTTPException(status_code=404, detail="Loket not found")
+    version = await versions.get(event_id)
+    etag = make_etag(version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    async def load() -> bytes:
+        async with fresh_session(db, version) as session:
+            info = await _loket_info(session, loket_id)
+        return info.model_dump_json().encode()
+
+    body = await state_cache.fetch(f"loket:{loket_id}:info", version, load)
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+async def _loket_info(db: AsyncSession, loket_id: int) -> LoketInfo:
     # ambil loket
-    result = await db.execute(
-        select(Loket).where(Loket.id == loket_id)
+    lokets = await records.fetch(
+        db, records.select_lokets().where(Loket.id == loket_id), records.LoketRecord
     )
-    loket = result.scalar_one_or_none()
-    if not loket:
+    if not lokets:
         raise HTTPException(status_code=404, detail="Loket not found")
+    loket = lokets[0]
 
-    # hitung tiket waiting
-    result_count = await db.execute(
-        select(func.count(Ticket.id)).where(
-            Ticket.loket_id == loket_id,
-            Ticket.status == "waiting",
+    if redis_queue.enabled():
+        current_number, last_number, waiting_count, hold_numbers = (
+            await redis_queue.snapshot(db, loket_id)
+        )
+        return LoketInfo(
+            loket_id=loket.id,
+            loket_name=loket.name,
+            loket_code=loket.code,
+            loket_description=loket.description,
+            current_number=current_number,
+            queue_length=waiting_count,
+            last_ticket_number=last_number,
+            last_repeat_at=loket.last_repeat_at,
+            hold_numbers=hold_numbers,
         )
-    )
-    waiting_count = result_count.scalar_one() or 0
 
-    # ambil nomor tiket yang statusnya HOLD
-    result_hold = await db.execute(
-        select(Ticket.number)
-        .where(
-            Ticket.loket_id == loket_id,
-            Ticket.status == "hold",
+    # jumlah waiting dari counter loket (O(1));
+    # nomor HOLD hanya diambil kalau memang ada
+    waiting_count = loket.waiting_count or 0
+    hold_numbers = []
+    if loket.hold_count:
+        result_hold = await db.execute(
+            select(Ticket.number)
+            .where(
+                Ticket.loket_id == loket_id,
+                Ticket.status == "hold",
+            )
+            .order_by(Ticket.number)
         )
-        .order_by(Ticket.number)
-    )
-    hold_numbers = [row[0] for row in result_hold.all()]
+        hold_numbers = [row[0] for row in result_hold.all()]
 
     return LoketInfo(
         loket_id=loket.id,
@@ -161,6 +411,38 @@ async def loket_info(
     )
 
 
+@router.get("/lokets/{loket_id}/stream")
+async def loket_stream(
+    loket_id: int,
+    db: AsyncSession = Depends(get_consistent_read_database),
+):
+    """
+    Server-Sent Events untuk display satu loket: snapshot state loket saat
+    connect (event: snapshot), lalu setiap perubahannya (event: loket).
+    """
+    loket = await metadata.loket(db, loket_id)
+    if loket is None:
+        raise HTTPException(status_code=404, detail="Loket not found")
+    event_id = loket.event_id
+
+    # subscribe dulu supaya perubahan selama snapshot tidak terlewat
+    subscriber = broadcaster.subscribe(event_id, loket_id)
+    try:
+        states = await build_loket_states(db, event_id, [loket_id])
+    except Exception:
+        broadcaster.unsubscribe(subscriber)
+        raise
+
+    # koneksi DB tidak ditahan selama stream terbuka
+    await db.close()
+
+    return StreamingResponse(
+        sse_stream(subscriber, sse_message("snapshot", states[0].model_dump_json())),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.post("/lokets/{loket_id}/repeat")
 async def repeat_call(
     loket_id: int,
@@ -171,18 +453,29 @@ async def repeat_call(
     if not loket:
         raise HTTPException(status_code=404, detail="Loket not found")
 
-    # update waktu repeat
+    current_number = loket.current_number
+    if redis_queue.enabled():
+        # di mode redis kolom DB bisa tertinggal dari persister write-behind
+        state = await redis_queue.snapshot(db, loket_id)
+        if state is not None:
+            current_number = state[0]
+
+    # update waktu repeat (expire_on_commit=False: tidak perlu refresh)
     loket.last_repeat_at = datetime.now(timezone.utc)
-    db.add(loket)
+    announcement = await announcements.record(
+        db, loket.event_id, loket_id, "repeat", current_number
+    )
     await db.commit()
-    await db.refresh(loket)
+    await versions.bump(loket.event_id)
+    await broadcaster.loket_changed(loket.event_id, loket_id)
+    await announcements.publish([announcement])
 
     return {
       "message": "Repeat requested",
       "loket_name": loket.name,
       "loket_description": loket.description,
       "loket_code": loket.code,
-      "current_number": loket.current_number,
+      "current_number": current_number,
       "last_repeat_at": loket.last_repeat_at,
     }
 
@@ -192,6 +485,25 @@ async def hold_current_ticket(
     loket_id: int,
     db: AsyncSession = Depends(get_database),
 ):
+    if redis_queue.enabled():
+        loket = await metadata.loket(db, loket_id)
+        if loket is None:
+            raise HTTPException(status_code=404, detail="Loket not found")
+        hold_number = await redis_queue.hold_current(db, loket_id)
+        if hold_number is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Tidak ada nomor aktif untuk di-hold",
+            )
+        await versions.bump(loket.event_id)
+        await broadcaster.loket_changed(loket.event_id, loket_id)
+        return {
+            "message": "Ticket di-hold",
+            "hold_number": hold_number,
+            "loket_id": loket.id,
+            "loket_code": loket.code,
+        }
+
     # ambil loket
     result = await db.execute(select(Loket).where(Loket.id == loket_id))
     loket = result.scalar_one_or_none()
@@ -204,39 +516,56 @@ async def hold_current_ticket(
             detail="Tidak ada nomor aktif untuk di-hold",
         )
 
-    # cari tiket dengan nomor = current_number
-    result_ticket = await db.execute(
-        select(Ticket).where(
+    hold_number = loket.current_number
+
+    # set status hold langsung, hanya kalau status sebelumnya valid;
+    # status lama menentukan counter mana yang berubah
+    hold_query = (
+        update(Ticket)
+        .where(
             Ticket.loket_id == loket_id,
-            Ticket.number == loket.current_number,
+            Ticket.number == hold_number,
         )
+        .values(status="hold")
+        .execution_options(synchronize_session=False)
     )
-    ticket = result_ticket.scalar_one_or_none()
-    if not ticket:
-        raise HTTPException(
-            status_code=404,
-            detail="Ticket untuk nomor saat ini tidak ditemukan",
+    result_hold = await db.execute(hold_query.where(Ticket.status == "called"))
+    if result_hold.rowcount == 0:
+        result_hold = await db.execute(
+            hold_query.where(Ticket.status == "waiting")
         )
-
-    # opsional: validasi status sebelumnya
-    if ticket.status not in ("waiting", "called"):
+        if result_hold.rowcount:
+            loket.waiting_count = Loket.waiting_count - 1
+
+    if result_hold.rowcount == 0:
+        # cari tahu penyebabnya untuk pesan error
+        result_ticket = await db.execute(
+            select(Ticket.status).where(
+                Ticket.loket_id == loket_id,
+                Ticket.number == hold_number,
+            )
+        )
+        ticket_status = result_ticket.scalar_one_or_none()
+        if ticket_status is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Ticket untuk nomor saat ini tidak ditemukan",
+            )
         raise HTTPException(
             status_code=400,
-            detail=f"Tidak dapat hold ticket dengan status {ticket.status}",
+            detail=f"Tidak dapat hold ticket dengan status {ticket_status}",
         )
 
-    # set status hold & kosongkan current_number di loket
-    ticket.status = "hold"
+    # kosongkan current_number di loket
     loket.current_number = None
-
-    db.add_all([ticket, loket])
+    loket.hold_count = Loket.hold_count + 1
     await db.commit()
-    await db.refresh(loket)
-    await db.refresh(ticket)
+    await versions.bump(loket.event_id)
+    await broadcaster.loket_changed(loket.event_id, loket_id)
 
     return {
         "message": "Ticket di-hold",
-        "hold_number": ticket.number,
+        "hold_number": hold_number,
         "loket_id": loket.id,
         "loket_code": loket.code,
     }
@@ -248,22 +577,48 @@ async def call_held_ticket(
     number: int,
     db: AsyncSession = Depends(get_database),
 ):
+    if redis_queue.enabled():
+        loket = await metadata.loket(db, loket_id)
+        if loket is None:
+            raise HTTPException(status_code=404, detail="Loket not found")
+        called_number = await redis_queue.call_held(db, loket_id, number)
+        if called_number is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Ticket HOLD tidak ditemukan untuk nomor tersebut",
+            )
+        announcement = await announcements.record(
+            db, loket.event_id, loket_id, "call_held", called_number
+        )
+        await db.commit()
+        await versions.bump(loket.event_id)
+        await broadcaster.loket_changed(loket.event_id, loket_id)
+        await announcements.publish([announcement])
+        return {
+            "loket_id": loket.id,
+            "loket_code": loket.code,
+            "called_number": called_number,
+            "message": "Ticket HOLD dipanggil kembali",
+        }
+
     # Ambil loket
     result_loket = await db.execute(select(Loket).where(Loket.id == loket_id))
     loket = result_loket.scalar_one_or_none()
     if not loket:
         raise HTTPException(status_code=404, detail="Loket not found")
 
-    # Ambil ticket yang di-HOLD
+    # Panggil ticket yang di-HOLD
     result_ticket = await db.execute(
-        select(Ticket).where(
+        update(Ticket)
+        .where(
             Ticket.loket_id == loket_id,
             Ticket.number == number,
             Ticket.status == "hold",
         )
+        .values(status="called")
+        .execution_options(synchronize_session=False)
     )
-    ticket = result_ticket.scalar_one_or_none()
-    if not ticket:
+    if result_ticket.rowcount == 0:
         raise HTTPException(
             status_code=404,
             detail="Ticket HOLD tidak ditemukan untuk nomor tersebut",
@@ -274,17 +629,19 @@ async def call_held_ticket(
     # - Di-set DONE, atau
     # - Tetap dibiarkan (ganti saja ke nomor HOLD).
     # Di sini kita langsung ganti current_number ke nomor HOLD.
-    loket.current_number = ticket.number
-    ticket.status = "called"
-
-    db.add_all([loket, ticket])
+    loket.current_number = number
+    loket.hold_count = Loket.hold_count - 1
+    announcement = await announcements.record(
+        db, loket.event_id, loket_id, "call_held", number
+    )
     await db.commit()
-    await db.refresh(ticket)
+    await versions.bump(loket.event_id)
+    await broadcaster.loket_changed(loket.event_id, loket_id)
+    await announcements.publish([announcement])
 
     return {
         "loket_id": loket.id,
         "loket_code": loket.code,
-        "called_number": ticket.number,
+        "called_number": number,
         "message": "Ticket HOLD dipanggil kembali",
     }
-
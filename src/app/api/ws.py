@@ -0,0 +1,70 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from src.config.database import ConsistentReadSessionLocal
+from src.app.services.broadcast import broadcaster, ws_message
+from src.app.services.metadata import metadata
+from src.app.services.queue_state import build_loket_states, loket_states_adapter
+
+router = APIRouter(tags=["displays"])
+
+
+@router.websocket("/ws/events/{event_id}")
+async def event_socket(
+    websocket: WebSocket,
+    event_id: int,
+    loket_id: Optional[int] = None,
+):
+    """
+    WebSocket untuk display: {"type": "snapshot", "data": [...]} saat
+    connect, lalu {"type": "loket", "data": {...}} setiap ada perubahan.
+    Opsional ?loket_id= untuk display satu loket.
+    """
+    async with ConsistentReadSessionLocal() as db:
+        if await metadata.event(db, event_id) is None:
+            await websocket.close(code=4404, reason="Event not found")
+            return
+
+        # subscribe dulu supaya perubahan selama snapshot tidak terlewat
+        subscriber = broadcaster.subscribe(event_id, loket_id, fmt="ws")
+        try:
+            states = await build_loket_states(
+                db, event_id, [loket_id] if loket_id is not None else None
+            )
+        except Exception:
+            broadcaster.unsubscribe(subscriber)
+            raise
+
+    await websocket.accept()
+    # client tidak mengirim apa-apa; receive hanya untuk mendeteksi disconnect
+    watcher = asyncio.create_task(_watch_disconnect(websocket, subscriber))
+    try:
+        await websocket.send_text(
+            ws_message("snapshot", loket_states_adapter.dump_json(states).decode())
+        )
+        while not subscriber.closed:
+            message = await subscriber.receive()
+            if message is None or subscriber.closed:
+                break
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broadcaster.unsubscribe(subscriber)
+        if not watcher.done():
+            watcher.cancel()
+            try:
+                await websocket.close()
+            except Exception:
+                pass
+
+
+async def _watch_disconnect(websocket: WebSocket, subscriber) -> None:
+    try:
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        subscriber.closed = True
+        subscriber.send(None)
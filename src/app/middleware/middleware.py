@@ -5,6 +5,9 @@ import logging
 import time
 import uuid
 
+from src.config.database import REPLICA_LAGS, STICKY_COOKIE
+from src.config.settings import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -69,6 +72,30 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         return response
 
 
+class ReadAfterWriteMiddleware(BaseHTTPMiddleware):
+    """
+    After a successful write, mark the client (cookie) so its reads go to
+    the primary for a few seconds and it sees its own write even if the
+    read replica lags.
+    """
+
+    WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+
+        if request.method in self.WRITE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE,
+                f"{time.time() + settings.read_sticky_seconds:.3f}",
+                max_age=max(int(settings.read_sticky_seconds), 1),
+                httponly=True,
+                samesite="lax",
+            )
+
+        return response
+
+
 def setup_cors_middleware(app):
     """
     Setup CORS middleware
@@ -79,6 +106,7 @@ def setup_cors_middleware(app):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "X-State-Version"],
     )
 
 
@@ -88,3 +116,5 @@ def setup_custom_middleware(app):
     """
     app.add_middleware(LoggingMiddleware)
     app.add_middleware(SecurityHeadersMiddleware)
+    if REPLICA_LAGS:
+        app.add_middleware(ReadAfterWriteMiddleware)
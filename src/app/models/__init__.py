@@ -4,6 +4,9 @@ from .event import Event
 from .loket import Loket
 from .ticket import Ticket
 from .sound_source import SoundSource
+from .announcement import Announcement
+from .replica_heartbeat import ReplicaHeartbeat
+from .export_job import ExportJob
 
 __all__ = [
     "BaseModel",
@@ -12,4 +15,7 @@ __all__ = [
     "Loket",
     "Ticket",
     "SoundSource",
+    "Announcement",
+    "ReplicaHeartbeat",
+    "ExportJob",
 ]
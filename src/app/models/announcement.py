@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from .base import Base
+
+
+class Announcement(Base):
+    """
+    Append-only log of calls for the displays to announce. seq is the
+    per-event sequence number (see Event.announcement_seq); rows are
+    trimmed by age / count, so no foreign keys.
+    """
+    __tablename__ = "announcements"
+    __table_args__ = (
+        # "announcement setelah seq N" per event
+        Index("uq_announcements_event_id_seq", "event_id", "seq", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, nullable=False)
+    loket_id = Column(Integer, nullable=False)
+    seq = Column(Integer, nullable=False)
+
+    kind = Column(String(20), nullable=False)  # call, repeat, call_held
+    number = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
@@ -11,6 +11,10 @@ class Event(Base):
     code = Column(String(50), unique=True, index=True, nullable=False)
     is_active = Column(Boolean, default=True)
 
+    # seq announcement terakhir; dinaikkan di transaksi panggilan (row lock
+    # event), jadi urutan seq = urutan commit per event
+    announcement_seq = Column(Integer, default=0, server_default="0", nullable=False)
+
     lokets = relationship("Loket", back_populates="event")
     tickets = relationship("Ticket", back_populates="event")
     sound_sources = relationship("SoundSource", back_populates="event")
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Index
+from .base import Base
+
+
+class ExportJob(Base):
+    """
+    Export running in the background worker (see services/export_jobs).
+    The row is also the job queue: pending jobs are claimed by flipping the
+    status; updated_at is the heartbeat of the worker running it.
+    """
+    __tablename__ = "export_jobs"
+    __table_args__ = (
+        # job berikutnya untuk worker
+        Index("ix_export_jobs_status_created_at", "status", "created_at"),
+        # export yang sama yang masih baru (dedup)
+        Index("ix_export_jobs_dedup_key", "dedup_key"),
+    )
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(20), nullable=False)  # events, lokets, tickets, loket_tickets, all
+    params = Column(Text, nullable=False)  # JSON: event_id, loket_id, status
+    dedup_key = Column(String(64), nullable=False)
+
+    status = Column(String(20), nullable=False)  # pending, running, done, failed
+    # dinaikkan tiap kali job diklaim; worker hanya boleh menulis selama
+    # attempt di baris masih miliknya (klaim ulang job basi memagari yang lama)
+    attempt = Column(Integer, nullable=False, default=0, server_default="0")
+    rows_total = Column(Integer, nullable=True)
+    rows_done = Column(Integer, nullable=False, default=0)
+    size_bytes = Column(BigInteger, nullable=True)
+    filename = Column(String(255), nullable=False)
+    media_type = Column(String(50), nullable=False)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
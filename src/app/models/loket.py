@@ -17,6 +17,11 @@ class Loket(Base):
     # nomor tiket terakhir yang diterbitkan untuk loket ini
     last_ticket_number = Column(Integer, default=0)
 
+    # counter antrian (denormalisasi), di-update di transaksi yang sama
+    # dengan perubahan status tiket; perbaiki dengan queue_counters kalau drift
+    waiting_count = Column(Integer, default=0, server_default="0", nullable=False)
+    hold_count = Column(Integer, default=0, server_default="0", nullable=False)
+
     last_repeat_at = Column(DateTime, nullable=True)
 
     description = Column(Text, nullable=True)
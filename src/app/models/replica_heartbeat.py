@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger
+from .base import Base
+
+
+class ReplicaHeartbeat(Base):
+    """
+    Single row written on the primary every few seconds; reading it back
+    from the read replica tells how far the replica has applied.
+    """
+    __tablename__ = "replica_heartbeat"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    # waktu tulis di primary, epoch dalam ms (sebanding dengan versi event)
+    beat_ms = Column(BigInteger, nullable=False)
@@ -1,11 +1,19 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from .base import Base
 
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # 1 nomor per loket; juga dipakai sebagai index FK loket_id
+        UniqueConstraint("loket_id", "number", name="uq_tickets_loket_number"),
+        # next_ticket, jumlah waiting, daftar hold, cek waiting di delete_loket
+        Index("ix_tickets_loket_status_number", "loket_id", "status", "number"),
+        # export per event (+ filter status)
+        Index("ix_tickets_event_status", "event_id", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class AnnouncementRead(BaseModel):
+    seq: int
+    event_id: int
+    loket_id: int
+    kind: str  # call, repeat, call_held
+    number: Optional[int] = None
+    created_at: datetime
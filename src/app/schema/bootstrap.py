@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from .event import EventRead
+from .loket import LoketRead, LoketState
+from .sound_source import SoundSourceConfig
+
+
+class DisplayBootstrap(BaseModel):
+    # sama dengan ETag / X-State-Version; dipakai sebagai since untuk
+    # long-poll state
+    version: int
+    event: EventRead
+    lokets: List[LoketRead]
+    state: List[LoketState]
+    sound: SoundSourceConfig
+    # seq announcement terakhir; dipakai sebagai after untuk announcements
+    last_announcement_seq: Optional[int] = None
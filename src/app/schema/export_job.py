@@ -0,0 +1,40 @@
+from pydantic import BaseModel
+from typing import Literal, Optional
+from datetime import datetime
+
+# format file export (lihat services/exports.FORMATS)
+ExportFormatName = Literal["csv", "csv.gz", "ndjson", "ndjson.gz"]
+
+
+class ExportJobCreate(BaseModel):
+    # sama dengan endpoint export: events, lokets (per event), tickets (per
+    # event, filter loket_id/status), loket_tickets, all (ZIP per event)
+    kind: Literal["events", "lokets", "tickets", "loket_tickets", "all"]
+    event_id: Optional[int] = None
+    loket_id: Optional[int] = None
+    # filter status tiket (seperti ?status= di endpoint export)
+    status: Optional[str] = None
+    # untuk kind "all" hanya csv / ndjson yang berpengaruh (ZIP sudah terkompresi)
+    format: ExportFormatName = "csv"
+
+
+class ExportJobRead(BaseModel):
+    id: str
+    kind: str
+    event_id: Optional[int] = None
+    loket_id: Optional[int] = None
+    ticket_status: Optional[str] = None
+    format: str = "csv"
+    status: str  # pending, running, done, failed
+    rows_done: int
+    rows_total: Optional[int] = None
+    # 0..1, None selama jumlah baris belum dihitung
+    progress: Optional[float] = None
+    size_bytes: Optional[int] = None
+    filename: str
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # true kalau export yang sama baru saja dibuat dan dipakai ulang
+    reused: bool = False
@@ -20,7 +20,8 @@ class LoketRead(BaseModel):
     name: str
     code: str
     event_id: int
-    current_number: int
+    # None setelah nomor aktif di-hold
+    current_number: Optional[int]
     last_ticket_number: int
     description: Optional[str] = None
 
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 
 class TicketRead(BaseModel):
@@ -24,8 +24,28 @@ class TicketCreateResponse(BaseModel):
     number: int
 
 
+class TicketBulkCreate(BaseModel):
+    count: int = Field(..., ge=1, le=10000)
+
+
+class TicketBulkCreateResponse(BaseModel):
+    loket_id: int
+    loket_name: str
+    loket_code: str
+    event_id: int
+    event_name: str
+    count: int
+    # rentang nomor yang diterbitkan (inklusif)
+    first_number: int
+    last_number: int
+
+
 class NextTicketResponse(BaseModel):
     loket_id: int
     loket_code: str
     called_number: Optional[int]
     message: str
+
+
+class BatchNextRequest(BaseModel):
+    loket_ids: List[int] = Field(..., min_length=1, max_length=500)
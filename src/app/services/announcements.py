@@ -0,0 +1,188 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal
+from src.config.settings import settings
+from src.app.models.announcement import Announcement
+from src.app.models.event import Event
+from src.app.schema.announcement import AnnouncementRead
+from src.app.services.background import BackgroundTask, periodic
+from src.app.services.broadcast import broadcaster
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def _next_seq(db: AsyncSession, event_id: int) -> int:
+    """
+    Increment Event.announcement_seq and return the new value. The UPDATE
+    takes the row lock on the event until the caller commits, so the
+    announcements of an event commit in seq order and a display reading
+    "seq > after" never skips one that commits later with a lower seq.
+    """
+    condition = Event.id == event_id
+    next_value = Event.announcement_seq + 1
+
+    if db.get_bind().dialect.update_returning:
+        # SQLite / PostgreSQL: increment + ambil nilai dalam 1 statement
+        result = await db.execute(
+            update(Event)
+            .where(condition)
+            .values(announcement_seq=next_value)
+            .returning(Event.announcement_seq)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one()
+
+    # MySQL: LAST_INSERT_ID(expr) menyimpan nilai per koneksi
+    await db.execute(
+        update(Event)
+        .where(condition)
+        .values(announcement_seq=func.last_insert_id(next_value))
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(select(func.last_insert_id()))
+    return result.scalar_one()
+
+
+async def record(
+    db: AsyncSession,
+    event_id: int,
+    loket_id: int,
+    kind: str,
+    number: Optional[int],
+) -> Announcement:
+    """
+    Add an announcement to the caller's transaction with the next seq of
+    the event. Call it last, right before the commit: the event row stays
+    locked until then.
+    """
+    announcement = Announcement(
+        event_id=event_id,
+        loket_id=loket_id,
+        seq=await _next_seq(db, event_id),
+        kind=kind,
+        number=number,
+        created_at=_utcnow(),
+    )
+    db.add(announcement)
+    return announcement
+
+
+def to_read(announcement: Announcement) -> AnnouncementRead:
+    return AnnouncementRead(
+        seq=announcement.seq,
+        event_id=announcement.event_id,
+        loket_id=announcement.loket_id,
+        kind=announcement.kind,
+        number=announcement.number,
+        created_at=announcement.created_at,
+    )
+
+
+async def publish(announcements: Iterable[Announcement]) -> None:
+    """
+    Push committed announcements to SSE / WebSocket displays, in seq order.
+    """
+    for announcement in sorted(announcements, key=lambda a: (a.event_id, a.seq)):
+        await broadcaster.announce(
+            announcement.event_id,
+            announcement.loket_id,
+            to_read(announcement).model_dump_json(),
+        )
+
+
+async def fetch(
+    db: AsyncSession,
+    event_id: int,
+    after: Optional[int],
+    limit: int,
+) -> List[AnnouncementRead]:
+    """
+    Announcements of an event with seq > after, oldest first. Without after,
+    the latest limit announcements.
+    """
+    query = select(Announcement).where(Announcement.event_id == event_id)
+    if after is None:
+        result = await db.execute(
+            query.order_by(Announcement.seq.desc()).limit(limit)
+        )
+        rows = list(reversed(result.scalars().all()))
+    else:
+        result = await db.execute(
+            query.where(Announcement.seq > after)
+            .order_by(Announcement.seq)
+            .limit(limit)
+        )
+        rows = result.scalars().all()
+    return [to_read(row) for row in rows]
+
+
+class AnnouncementTrimmer:
+    """
+    Keeps the announcement log bounded: drops rows older than max_age
+    seconds and all but the newest max_per_event rows of each event.
+    Deletes are idempotent, so every worker may run one.
+    """
+
+    def __init__(self, interval: float, max_age: int, max_per_event: int):
+        self.interval = interval
+        self.max_age = max_age
+        self.max_per_event = max_per_event
+        self._task = BackgroundTask(
+            lambda: periodic(self.trim_once, self.interval, "Announcement trim")
+        )
+
+    def start(self) -> None:
+        self._task.start()
+
+    async def stop(self) -> None:
+        await self._task.stop()
+
+    async def trim_once(self) -> int:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                delete(Announcement)
+                .where(Announcement.created_at < _utcnow() - timedelta(seconds=self.max_age))
+                .execution_options(synchronize_session=False)
+            )
+            deleted = result.rowcount
+
+            result_events = await session.execute(
+                select(Announcement.event_id)
+                .group_by(Announcement.event_id)
+                .having(func.count(Announcement.id) > self.max_per_event)
+            )
+            for event_id in result_events.scalars().all():
+                # seq tertua yang masih disimpan untuk event ini
+                result_cutoff = await session.execute(
+                    select(Announcement.seq)
+                    .where(Announcement.event_id == event_id)
+                    .order_by(Announcement.seq.desc())
+                    .offset(self.max_per_event - 1)
+                    .limit(1)
+                )
+                cutoff = result_cutoff.scalar_one()
+                result = await session.execute(
+                    delete(Announcement)
+                    .where(Announcement.event_id == event_id, Announcement.seq < cutoff)
+                    .execution_options(synchronize_session=False)
+                )
+                deleted += result.rowcount
+
+            await session.commit()
+        return deleted
+
+
+trimmer = AnnouncementTrimmer(
+    interval=settings.announcement_trim_interval,
+    max_age=settings.announcement_max_age,
+    max_per_event=settings.announcement_max_per_event,
+)
@@ -0,0 +1,91 @@
+"""
+Long-running tasks of a worker: periodic loops and Redis pub/sub
+listeners, started on startup and cancelled on shutdown (see main.py).
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from src.config.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTask:
+    """
+    Owns one asyncio task running target(): start() creates it (once),
+    stop() cancels it and waits until it has ended.
+    """
+
+    def __init__(self, target: Callable[[], Awaitable[None]]):
+        self.target = target
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.target())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+async def periodic(
+    step: Callable[[], Awaitable[Any]],
+    interval: float,
+    name: str,
+    on_error: Optional[Callable[[Exception], None]] = None,
+) -> None:
+    """
+    Run step, then sleep interval seconds, forever. An error is logged (or
+    passed to on_error) and the loop goes on.
+    """
+    while True:
+        try:
+            await step()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if on_error is not None:
+                on_error(e)
+            else:
+                logger.error(f"{name} error: {e}")
+        await asyncio.sleep(interval)
+
+
+async def listen(
+    channel: str,
+    on_message: Callable[[bytes], None],
+    name: str,
+    on_subscribe: Optional[Callable[[], None]] = None,
+) -> None:
+    """
+    Pass the data of every message published on a Redis channel to
+    on_message, forever. After an error the subscription is opened again;
+    on_subscribe runs after every (re)subscribe, since messages published
+    in between are lost.
+    """
+    while True:
+        pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(channel)
+            if on_subscribe is not None:
+                on_subscribe()
+            async for raw in pubsub.listen():
+                on_message(raw["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"{name} error: {e}")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
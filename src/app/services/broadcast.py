@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+from src.config.database import ConsistentReadSessionLocal
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.app.services.background import BackgroundTask, listen
+from src.app.services.queue_state import build_loket_states
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "queue:changes"
+
+
+def sse_message(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+def ws_message(event: str, data: str) -> str:
+    return f'{{"type":"{event}","data":{data}}}'
+
+
+FORMATTERS = {
+    "sse": sse_message,
+    "ws": ws_message,
+}
+
+
+class Subscriber:
+    """
+    One display connection (SSE or WebSocket). Messages are pre-formatted
+    strings shared by all subscribers of a worker, so a slow client only
+    costs its queue slots.
+    """
+
+    def __init__(
+        self, event_id: int, loket_id: Optional[int], fmt: str, maxsize: int
+    ):
+        self.event_id = event_id
+        self.loket_id = loket_id
+        self.fmt = fmt
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def send(self, message: Optional[str]) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # client terlalu lambat: putuskan, client akan reconnect
+            # dan mendapat snapshot baru
+            self.closed = True
+
+    async def receive(self, timeout: Optional[float] = None) -> Optional[str]:
+        return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+
+
+class Broadcaster:
+    """
+    Fan-out of loket state changes to display subscribers.
+
+    The worker that made a change loads the new state (coalesced per loket:
+    while an event is being loaded, further changes only mark lokets dirty)
+    and delivers it. With the "redis" backend delivery goes through Redis
+    pub/sub, and every worker receives each change once and formats it once
+    per wire format for all of its local subscribers.
+    """
+
+    def __init__(self, backend: str = "memory", queue_size: int = 100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscriber]] = defaultdict(set)
+        self._dirty: Dict[int, Set[int]] = defaultdict(set)
+        self._flushing: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._listener = BackgroundTask(
+            lambda: listen(CHANNEL, self._on_message, "Broadcast listener")
+        )
+
+    # --------------------------------------------------------
+    # Subscribers
+    # --------------------------------------------------------
+
+    def subscribe(
+        self, event_id: int, loket_id: Optional[int] = None, fmt: str = "sse"
+    ) -> Subscriber:
+        subscriber = Subscriber(event_id, loket_id, fmt, self.queue_size)
+        self._subscribers[event_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.event_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.event_id]
+
+    def dispatch(
+        self, event_id: int, event: str, data: str, loket_id: Optional[int] = None
+    ) -> None:
+        """
+        Send a message to the local subscribers of an event.
+        """
+        formatted: Dict[str, str] = {}
+        for subscriber in list(self._subscribers.get(event_id, ())):
+            if loket_id is not None and subscriber.loket_id not in (None, loket_id):
+                continue
+            message = formatted.get(subscriber.fmt)
+            if message is None:
+                message = formatted[subscriber.fmt] = FORMATTERS[subscriber.fmt](event, data)
+            subscriber.send(message)
+
+    # --------------------------------------------------------
+    # Changes
+    # --------------------------------------------------------
+
+    async def loket_changed(self, event_id: int, loket_id: int) -> None:
+        """
+        Called after a commit that changed the state of a loket.
+        """
+        self._mark_dirty(event_id, [loket_id])
+
+    async def announce(self, event_id: int, loket_id: int, data: str) -> None:
+        """
+        Deliver an announcement (already JSON) as-is, without a state load.
+        """
+        await self._deliver(event_id, "announcement", data, loket_id)
+
+    def _mark_dirty(self, event_id: int, loket_ids: Iterable[int]) -> None:
+        # backend memory: tidak ada subscriber di worker ini, tidak ada
+        # yang perlu dikirim
+        if self.backend != "redis" and event_id not in self._subscribers:
+            return
+        self._dirty[event_id].update(loket_ids)
+        if event_id not in self._flushing:
+            self._flushing.add(event_id)
+            task = asyncio.create_task(self._flush(event_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, event_id: int) -> None:
+        try:
+            while self._dirty.get(event_id):
+                loket_ids = self._dirty.pop(event_id)
+                async with ConsistentReadSessionLocal() as session:
+                    states = await build_loket_states(session, event_id, loket_ids)
+                for state in states:
+                    await self._deliver(
+                        event_id, "loket", state.model_dump_json(), state.loket_id
+                    )
+        except Exception as e:
+            logger.error(f"Broadcast error for event {event_id}: {e}")
+        finally:
+            self._flushing.discard(event_id)
+            self._dirty.pop(event_id, None)
+
+    async def _deliver(
+        self, event_id: int, event: str, data: str, loket_id: Optional[int]
+    ) -> None:
+        if self.backend != "redis":
+            self.dispatch(event_id, event, data, loket_id)
+            return
+        await redis_client.publish(
+            CHANNEL,
+            json.dumps({
+                "event_id": event_id,
+                "loket_id": loket_id,
+                "event": event,
+                "data": json.loads(data),
+            }),
+        )
+
+    # --------------------------------------------------------
+    # Redis relay
+    # --------------------------------------------------------
+
+    def start(self) -> None:
+        if self.backend == "redis":
+            self._listener.start()
+
+    async def stop(self) -> None:
+        self.close()
+        await self._listener.stop()
+
+    def _on_message(self, raw: bytes) -> None:
+        message = json.loads(raw)
+        event_id = message["event_id"]
+        if event_id not in self._subscribers:
+            return
+        self.dispatch(
+            event_id,
+            message["event"],
+            json.dumps(message["data"], separators=(",", ":")),
+            message.get("loket_id"),
+        )
+
+    def close(self) -> None:
+        """
+        End every open stream / socket (on shutdown).
+        """
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.closed = True
+                subscriber.send(None)
+
+
+async def sse_stream(subscriber: Subscriber, first: str, keepalive: float = 15.0):
+    """
+    Body of a text/event-stream response: the snapshot, then changes.
+    """
+    try:
+        yield first
+        while not subscriber.closed:
+            try:
+                message = await subscriber.receive(keepalive)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is None or subscriber.closed:
+                break
+            yield message
+    finally:
+        broadcaster.unsubscribe(subscriber)
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+broadcaster = Broadcaster(backend=settings.broadcast_backend)
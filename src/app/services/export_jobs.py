@@ -0,0 +1,375 @@
+"""
+Background export jobs: the API records the job, a worker writes the
+artifact to EXPORT_DIR and the client downloads it when done. Run a worker
+next to the API (or set EXPORT_WORKER_INLINE=true for a single box):
+
+    python -m src.app.services.export_jobs
+"""
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal, ConsistentReadSessionLocal, close_database
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.app.models.export_job import ExportJob
+from src.app.schema.export_job import ExportJobRead
+from src.app.services.background import BackgroundTask
+from src.app.services import exports
+
+logger = logging.getLogger(__name__)
+
+# daftar id job baru di Redis, hanya untuk membangunkan worker lebih cepat
+WAKEUP_KEY = "exports:pending"
+
+# progress ditulis ke database paling sering sekali per sekian detik
+PROGRESS_INTERVAL = 0.5
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def dedup_key(kind: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps({"kind": kind, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def artifact_path(job: ExportJob) -> str:
+    # satu file per attempt: worker yang klaimnya diambil alih tidak
+    # pernah menimpa artefak worker yang baru
+    return os.path.join(settings.export_dir, f"{job.id}.{job.attempt}")
+
+
+class ClaimLost(Exception):
+    """
+    The job was claimed again by another worker (heartbeat went stale).
+    """
+
+
+def to_read(job: ExportJob, reused: bool = False) -> ExportJobRead:
+    params = json.loads(job.params)
+    progress = None
+    if job.status == "done":
+        progress = 1.0
+    elif job.rows_total is not None:
+        progress = round(min(job.rows_done / job.rows_total, 1.0), 4) if job.rows_total else 1.0
+    return ExportJobRead(
+        id=job.id,
+        kind=job.kind,
+        event_id=params.get("event_id"),
+        loket_id=params.get("loket_id"),
+        ticket_status=params.get("status"),
+        format=params.get("format", "csv"),
+        status=job.status,
+        rows_done=job.rows_done,
+        rows_total=job.rows_total,
+        progress=progress,
+        size_bytes=job.size_bytes,
+        filename=job.filename,
+        error=job.error,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        reused=reused,
+    )
+
+
+async def submit(db: AsyncSession, kind: str, params: Dict[str, Any]) -> Tuple[ExportJob, bool]:
+    """
+    Queue an export, or return the same export if it is still queued,
+    running, or finished less than export_job_ttl seconds ago (second
+    value True). Commits.
+    """
+    key = dedup_key(kind, params)
+    result = await db.execute(
+        select(ExportJob)
+        .where(
+            ExportJob.dedup_key == key,
+            or_(
+                ExportJob.status.in_(("pending", "running")),
+                (ExportJob.status == "done")
+                & (ExportJob.finished_at >= _utcnow() - timedelta(seconds=settings.export_job_ttl)),
+            ),
+        )
+        .order_by(ExportJob.created_at.desc())
+        .limit(1)
+    )
+    job = result.scalar_one_or_none()
+    if job is not None and (job.status != "done" or os.path.exists(artifact_path(job))):
+        return job, True
+
+    export = exports.plan(kind, **params)
+    now = _utcnow()
+    job = ExportJob(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        params=json.dumps(params, sort_keys=True),
+        dedup_key=key,
+        status="pending",
+        attempt=0,
+        rows_done=0,
+        filename=export.filename,
+        media_type=export.media_type,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    await db.commit()
+
+    if settings.export_wakeup_backend == "redis":
+        try:
+            await redis_client.rpush(WAKEUP_KEY, job.id)
+        except Exception as e:
+            # worker tetap menemukan job lewat polling
+            logger.warning(f"Export wakeup failed: {e}")
+    return job, False
+
+
+async def get(db: AsyncSession, job_id: str) -> Optional[ExportJob]:
+    result = await db.execute(select(ExportJob).where(ExportJob.id == job_id))
+    return result.scalar_one_or_none()
+
+
+class ExportWorker:
+    """
+    Claims pending export jobs one at a time and writes their artifact.
+    A job is claimed with a conditional UPDATE on its status, so several
+    workers (processes or hosts sharing EXPORT_DIR) never run the same
+    job; a running job whose heartbeat is older than stale_after seconds
+    (its worker died or hung) is claimed again with the next attempt, and
+    every later write of the old attempt is refused.
+    """
+
+    def __init__(self, poll_interval: float, stale_after: float, ttl: int):
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.ttl = ttl
+        self._task = BackgroundTask(self.run_forever)
+        self._last_cleanup = 0.0
+
+    def start(self) -> None:
+        self._task.start()
+
+    async def stop(self) -> None:
+        await self._task.stop()
+
+    async def run_forever(self) -> None:
+        os.makedirs(settings.export_dir, exist_ok=True)
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+                if time.monotonic() - self._last_cleanup > min(self.ttl, 60):
+                    await self.cleanup_once()
+                    self._last_cleanup = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Export worker error: {e}")
+            await self._wait()
+
+    async def _wait(self) -> None:
+        if settings.export_wakeup_backend == "redis":
+            try:
+                await redis_client.blpop(WAKEUP_KEY, timeout=max(int(self.poll_interval), 1))
+                return
+            except Exception as e:
+                logger.warning(f"Export wakeup unavailable: {e}")
+        await asyncio.sleep(self.poll_interval)
+
+    async def run_once(self) -> bool:
+        """
+        Run the next job, if any. Returns True if a job was run.
+        """
+        job = await self.claim()
+        if job is None:
+            return False
+        await self.run(job)
+        return True
+
+    async def claim(self) -> Optional[ExportJob]:
+        async with AsyncSessionLocal() as session:
+            stale = _utcnow() - timedelta(seconds=self.stale_after)
+            result = await session.execute(
+                select(ExportJob)
+                .where(
+                    or_(
+                        ExportJob.status == "pending",
+                        (ExportJob.status == "running") & (ExportJob.updated_at < stale),
+                    )
+                )
+                .order_by(ExportJob.created_at)
+                .limit(1)
+            )
+            job = result.scalar_one_or_none()
+            if job is None:
+                return None
+
+            now = _utcnow()
+            result = await session.execute(
+                update(ExportJob)
+                .where(
+                    ExportJob.id == job.id,
+                    ExportJob.status == job.status,
+                    ExportJob.attempt == job.attempt,
+                    ExportJob.updated_at == job.updated_at,
+                )
+                .values(
+                    status="running",
+                    attempt=ExportJob.attempt + 1,
+                    started_at=now,
+                    updated_at=now,
+                    rows_done=0,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            if result.rowcount == 0:
+                # diambil worker lain
+                return None
+            job.status = "running"
+            job.attempt += 1
+            return job
+
+    async def run(self, job: ExportJob) -> None:
+        params = json.loads(job.params)
+        export = exports.plan(job.kind, **params)
+        path = artifact_path(job)
+        part = f"{path}.part"
+        rows_done = 0
+        last_progress = time.monotonic()
+
+        def on_rows(count: int) -> None:
+            nonlocal rows_done
+            rows_done += count
+
+        try:
+            async with ConsistentReadSessionLocal() as session:
+                detail = await exports.missing(
+                    session, job.kind, event_id=params.get("event_id"), loket_id=params.get("loket_id")
+                )
+                if detail:
+                    raise LookupError(detail)
+                await self._progress(job, rows_total=await exports.count_rows(session, export))
+
+                f = await asyncio.to_thread(open, part, "wb")
+                try:
+                    async for chunk in exports.chunks(session, export, on_rows):
+                        await asyncio.to_thread(f.write, chunk)
+                        if time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                            await self._progress(job, rows_done=rows_done)
+                            last_progress = time.monotonic()
+                finally:
+                    await asyncio.to_thread(f.close)
+
+            os.replace(part, path)
+            try:
+                await self._finish(
+                    job, status="done", rows_done=rows_done, size_bytes=os.path.getsize(path)
+                )
+            except ClaimLost:
+                os.remove(path)
+                raise
+            logger.info(f"Export {job.id} ({job.kind}) done: {rows_done} rows")
+        except asyncio.CancelledError:
+            # worker berhenti: job diambil lagi setelah heartbeat basi
+            if os.path.exists(part):
+                os.remove(part)
+            raise
+        except ClaimLost:
+            logger.warning(f"Export {job.id} attempt {job.attempt} was claimed again, dropped")
+            if os.path.exists(part):
+                os.remove(part)
+        except Exception as e:
+            logger.error(f"Export {job.id} failed: {e}")
+            if os.path.exists(part):
+                os.remove(part)
+            try:
+                await self._finish(job, status="failed", rows_done=rows_done, error=str(e))
+            except ClaimLost:
+                pass
+
+    async def _progress(self, job: ExportJob, **values) -> None:
+        """
+        Heartbeat / progress of the job, only while this attempt still owns
+        it; raises ClaimLost otherwise.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(ExportJob)
+                .where(
+                    ExportJob.id == job.id,
+                    ExportJob.attempt == job.attempt,
+                    ExportJob.status == "running",
+                )
+                .values(updated_at=_utcnow(), **values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        if result.rowcount == 0:
+            raise ClaimLost(job.id)
+
+    async def _finish(self, job: ExportJob, **values) -> None:
+        now = _utcnow()
+        await self._progress(job, finished_at=now, **values)
+
+    async def cleanup_once(self) -> int:
+        """
+        Delete finished / failed jobs older than ttl and their artifacts.
+        """
+        cutoff = _utcnow() - timedelta(seconds=self.ttl)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(ExportJob.id).where(
+                    ExportJob.status.in_(("done", "failed")),
+                    ExportJob.finished_at < cutoff,
+                )
+            )
+            job_ids = result.scalars().all()
+            for job_id in job_ids:
+                # artefak semua attempt (dan .part yang tertinggal); id
+                # selalu 32 karakter, jadi prefix tidak kena job lain
+                for path in glob.glob(os.path.join(settings.export_dir, f"{job_id}*")):
+                    os.remove(path)
+            if job_ids:
+                await session.execute(
+                    delete(ExportJob)
+                    .where(ExportJob.id.in_(job_ids))
+                    .execution_options(synchronize_session=False)
+                )
+                await session.commit()
+        return len(job_ids)
+
+
+worker = ExportWorker(
+    poll_interval=settings.export_poll_interval,
+    stale_after=settings.export_stale_after,
+    ttl=settings.export_job_ttl,
+)
+
+
+async def main() -> None:
+    logger.info(f"Export worker started, artifacts in {settings.export_dir}")
+    try:
+        await worker.run_forever()
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(main())
@@ -0,0 +1,414 @@
+import asyncio
+import csv
+import io
+import json
+import zipfile
+import zlib
+from datetime import datetime
+from operator import attrgetter
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config.settings import settings
+from src.app.models.event import Event
+from src.app.models.loket import Loket
+from src.app.models.ticket import Ticket
+from src.app.services import records
+from src.app.services.records import EventRecord, LoketRecord, TicketRecord
+
+# jenis export (sama dengan endpoint di api/export.py)
+KINDS = ("events", "lokets", "tickets", "loket_tickets", "all")
+
+
+class ExportFormat(NamedTuple):
+    extension: str
+    media_type: str
+    encoding: str  # csv / ndjson
+    gzip: bool
+
+
+FORMATS = {
+    "csv": ExportFormat("csv", "text/csv; charset=utf-8", "csv", False),
+    "csv.gz": ExportFormat("csv.gz", "application/gzip", "csv", True),
+    "ndjson": ExportFormat("ndjson", "application/x-ndjson", "ndjson", False),
+    "ndjson.gz": ExportFormat("ndjson.gz", "application/gzip", "ndjson", True),
+}
+
+# Accept -> format, kalau ?format= tidak diisi
+ACCEPT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/gzip": "csv.gz",
+}
+
+
+def negotiate(format: Optional[str], accept: Optional[str]) -> str:
+    """
+    Export format from ?format= or else the Accept header (highest q
+    first); csv when neither names a supported format.
+    """
+    if format:
+        return format
+    ranked = []
+    for position, item in enumerate((accept or "").split(",")):
+        media_type, _, options = item.strip().partition(";")
+        q = 1.0
+        for option in options.split(";"):
+            name, _, value = option.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type.strip().lower() in ACCEPT_FORMATS and q > 0:
+            ranked.append((-q, position, ACCEPT_FORMATS[media_type.strip().lower()]))
+    return min(ranked)[2] if ranked else "csv"
+
+
+EVENT_HEADERS = ["id", "name", "code", "is_active"]
+
+LOKET_HEADERS = [
+    "id",
+    "event_id",
+    "name",
+    "code",
+    "current_number",
+    "last_ticket_number",
+    "last_repeat_at",
+    "description",
+]
+
+TICKET_HEADERS = [
+    "id",
+    "event_id",
+    "loket_id",
+    "number",
+    "status",
+    "created_at",
+    "called_at",
+]
+
+
+def _event_row(e: EventRecord) -> List[str]:
+    return [
+        str(e.id),
+        e.name,
+        e.code,
+        "1" if e.is_active else "0",
+    ]
+
+
+def _loket_row(l: LoketRecord) -> List[str]:
+    return [
+        str(l.id),
+        str(l.event_id),
+        l.name,
+        l.code,
+        str(l.current_number),
+        str(l.last_ticket_number),
+        l.last_repeat_at.isoformat() if l.last_repeat_at else "",
+        (l.description or "").replace("\n", " "),
+    ]
+
+
+def _ticket_row(t: TicketRecord) -> List[str]:
+    return [
+        str(t.id),
+        str(t.event_id),
+        str(t.loket_id),
+        str(t.number),
+        t.status,
+        t.created_at.isoformat() if t.created_at else "",
+        t.called_at.isoformat() if t.called_at else "",
+    ]
+
+
+class ExportTable(NamedTuple):
+    name: str
+    headers: List[str]
+    query: Select
+    record: type
+    to_row: Callable[[tuple], List[str]]
+
+
+class ExportPlan(NamedTuple):
+    filename: str
+    media_type: str
+    tables: List[ExportTable]
+    zipped: bool
+    encoding: str = "csv"
+    gzip: bool = False
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+
+
+def _events_table(name: str, event_id: Optional[int] = None) -> ExportTable:
+    query = records.select_events()
+    if event_id is not None:
+        query = query.where(Event.id == event_id)
+    return ExportTable(name, EVENT_HEADERS, query.order_by(Event.id), EventRecord, _event_row)
+
+
+def _lokets_table(name: str, event_id: int) -> ExportTable:
+    query = records.select_lokets().where(Loket.event_id == event_id).order_by(Loket.id)
+    return ExportTable(name, LOKET_HEADERS, query, LoketRecord, _loket_row)
+
+
+def _tickets_table(
+    name: str,
+    event_id: Optional[int] = None,
+    loket_id: Optional[int] = None,
+    status: Optional[str] = None,
+) -> ExportTable:
+    query = records.select_tickets()
+    if event_id is not None:
+        query = query.where(Ticket.event_id == event_id)
+    if loket_id:
+        query = query.where(Ticket.loket_id == loket_id)
+    if status:
+        query = query.where(Ticket.status == status)
+    return ExportTable(name, TICKET_HEADERS, query.order_by(Ticket.id), TicketRecord, _ticket_row)
+
+
+def plan(
+    kind: str,
+    event_id: Optional[int] = None,
+    loket_id: Optional[int] = None,
+    status: Optional[str] = None,
+    format: str = "csv",
+) -> ExportPlan:
+    """
+    What an export of the given kind contains and how it is named. The
+    caller checks that the event / loket exists (see missing). The "all"
+    ZIP is already compressed: its members use the csv / ndjson part of
+    format without gzip.
+    """
+    fmt = FORMATS[format]
+    ts = _timestamp()
+    if kind == "all":
+        ext = fmt.encoding
+        return ExportPlan(
+            filename=f"event-{event_id}-export-{ts}.zip",
+            media_type="application/zip",
+            tables=[
+                _events_table(f"event-{event_id}.{ext}", event_id),
+                _lokets_table(f"event-{event_id}-lokets.{ext}", event_id),
+                _tickets_table(f"event-{event_id}-tickets.{ext}", event_id=event_id),
+            ],
+            zipped=True,
+            encoding=fmt.encoding,
+        )
+
+    if kind == "events":
+        name = f"events-{ts}.{fmt.extension}"
+        tables = [_events_table(name)]
+    elif kind == "lokets":
+        name = f"event-{event_id}-lokets-{ts}.{fmt.extension}"
+        tables = [_lokets_table(name, event_id)]
+    elif kind == "tickets":
+        name = f"event-{event_id}-tickets-{ts}.{fmt.extension}"
+        tables = [_tickets_table(name, event_id=event_id, loket_id=loket_id, status=status)]
+    elif kind == "loket_tickets":
+        name = f"loket-{loket_id}-tickets-{ts}.{fmt.extension}"
+        tables = [_tickets_table(name, loket_id=loket_id, status=status)]
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+    return ExportPlan(
+        name, fmt.media_type, tables, zipped=False, encoding=fmt.encoding, gzip=fmt.gzip
+    )
+
+
+async def missing(
+    db: AsyncSession,
+    kind: str,
+    event_id: Optional[int] = None,
+    loket_id: Optional[int] = None,
+) -> Optional[str]:
+    """
+    "Event not found" / "Loket not found" if the export refers to a row
+    that does not exist, else None.
+    """
+    if kind == "loket_tickets":
+        result = await db.execute(select(Loket.id).where(Loket.id == loket_id))
+        if result.scalar_one_or_none() is None:
+            return "Loket not found"
+    elif kind != "events":
+        result = await db.execute(select(Event.id).where(Event.id == event_id))
+        if result.scalar_one_or_none() is None:
+            return "Event not found"
+    return None
+
+
+async def count_rows(db: AsyncSession, export: ExportPlan) -> int:
+    total = 0
+    for table in export.tables:
+        result = await db.execute(
+            select(func.count()).select_from(table.query.order_by(None).subquery())
+        )
+        total += result.scalar_one()
+    return total
+
+
+# ============================================================
+# Streaming
+# ============================================================
+
+async def csv_chunks(
+    session: AsyncSession,
+    table: ExportTable,
+    on_rows: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield the CSV of table chunk by chunk: rows are fetched from a
+    server-side cursor export_chunk_size at a time and each chunk is encoded
+    and handed out before the next one is read, so memory does not grow
+    with the size of the export.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(table.headers)
+    yield output.getvalue().encode()
+
+    async for chunk in records.stream(session, table.query, table.record, settings.export_chunk_size):
+        output.seek(0)
+        output.truncate()
+        writer.writerows(table.to_row(item) for item in chunk)
+        yield output.getvalue().encode()
+        if on_rows is not None:
+            on_rows(len(chunk))
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+async def ndjson_chunks(
+    session: AsyncSession,
+    table: ExportTable,
+    on_rows: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Like csv_chunks, but one JSON object per line with the same fields as
+    the CSV header, keeping numbers, booleans and nulls typed.
+    """
+    values = attrgetter(*table.headers)
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_default)
+    async for chunk in records.stream(session, table.query, table.record, settings.export_chunk_size):
+        lines = [encoder.encode(dict(zip(table.headers, values(item)))) for item in chunk]
+        lines.append("")
+        yield "\n".join(lines).encode()
+        if on_rows is not None:
+            on_rows(len(chunk))
+
+
+def table_chunks(
+    session: AsyncSession,
+    table: ExportTable,
+    encoding: str,
+    on_rows: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    if encoding == "ndjson":
+        return ndjson_chunks(session, table, on_rows)
+    return csv_chunks(session, table, on_rows)
+
+
+async def gzip_chunks(body: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Gzip body on the fly (one gzip member, written as the chunks arrive).
+    Compression runs in a worker thread so the event loop is not blocked.
+    """
+    # wbits 16+: header & trailer gzip, bukan zlib
+    compressor = zlib.compressobj(settings.export_gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in body:
+        data = await asyncio.to_thread(compressor.compress, chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    Unseekable sink for ZipFile: collects what was written since the last
+    drain(). Because it cannot seek, ZipFile writes each member with a data
+    descriptor (sizes and CRC after the data) instead of going back to patch
+    the local header.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def zip_chunks(
+    session: AsyncSession,
+    tables: List[ExportTable],
+    encoding: str = "csv",
+    on_rows: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP archive with one CSV / NDJSON member per table, each
+    written incrementally from table_chunks. Compression runs in a worker thread so
+    the event loop is not blocked; memory is bounded by one chunk of rows
+    plus the deflate window.
+    """
+    sink = _ZipStream()
+    zf = zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED)
+
+    for table in tables:
+        info = zipfile.ZipInfo(table.name, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o600 << 16
+        # ukuran belum diketahui di awal: zip64 supaya aman di atas 2 GB
+        member = await asyncio.to_thread(zf.open, info, "w", force_zip64=True)
+        async for chunk in table_chunks(session, table, encoding, on_rows):
+            await asyncio.to_thread(member.write, chunk)
+            data = sink.drain()
+            if data:
+                yield data
+        await asyncio.to_thread(member.close)
+
+    # data descriptor member terakhir + central directory
+    await asyncio.to_thread(zf.close)
+    yield sink.drain()
+
+
+def chunks(
+    session: AsyncSession,
+    export: ExportPlan,
+    on_rows: Optional[Callable[[int], None]] = None,
+) -> AsyncIterator[bytes]:
+    if export.zipped:
+        return zip_chunks(session, export.tables, export.encoding, on_rows)
+    body = table_chunks(session, export.tables[0], export.encoding, on_rows)
+    if export.gzip:
+        return gzip_chunks(body)
+    return body
+
+
+async def stream(session_factory: async_sessionmaker, export: ExportPlan) -> AsyncIterator[bytes]:
+    """
+    The export body for a StreamingResponse. The generator runs after the
+    request dependencies are closed, so it opens its own session.
+    """
+    async with session_factory() as session:
+        async for chunk in chunks(session, export):
+            yield chunk
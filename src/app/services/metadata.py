@@ -0,0 +1,239 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.app.models.event import Event
+from src.app.models.loket import Loket
+from src.app.models.sound_source import SoundSource
+from src.app.services.background import BackgroundTask, listen
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "metadata:invalidate"
+
+_MISSING = object()
+
+
+class EventMeta(NamedTuple):
+    id: int
+    name: str
+    code: str
+    is_active: Optional[bool]
+
+
+class LoketMeta(NamedTuple):
+    id: int
+    event_id: int
+    name: str
+    code: str
+    description: Optional[str]
+
+
+class LRUCache:
+    """
+    Bounded mapping with least-recently-used eviction and a per-entry TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires = entry
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MetadataCache:
+    """
+    Per-worker cache of rarely-changing attributes: event name/code, loket
+    event/name/code/description and the sound config of an event.
+
+    Only found rows are cached, so a newly created event or loket is visible
+    immediately; rows read from the (possibly lagging) read replica are not
+    cached either, except the loket -> event mapping, which never changes. The update/delete endpoints invalidate entries; with the
+    "redis" broadcast backend the invalidation is also published so every
+    worker drops its copy. The TTL bounds staleness if a message is lost.
+    """
+
+    def __init__(self, backend: str = "memory", maxsize: int = 10000, ttl: float = 60.0):
+        self.backend = backend
+        self.events = LRUCache(maxsize, ttl)
+        self.lokets = LRUCache(maxsize, ttl)
+        self.loket_events = LRUCache(maxsize, ttl)
+        self.sounds = LRUCache(maxsize, ttl)
+        # naik setiap invalidasi: hasil query yang dimulai sebelum
+        # invalidasi tidak boleh disimpan (bisa berisi data lama)
+        self._generation = 0
+        # pesan bisa terlewat selama (re)connect: kosongkan cache
+        self._listener = BackgroundTask(
+            lambda: listen(CHANNEL, self._on_message, "Metadata listener", on_subscribe=self.clear)
+        )
+
+    # --------------------------------------------------------
+    # Lookups
+    # --------------------------------------------------------
+
+    async def event(self, db: AsyncSession, event_id: int) -> Optional[EventMeta]:
+        meta = self.events.get(event_id)
+        if meta is not _MISSING:
+            return meta
+        generation = self._generation
+        result = await db.execute(
+            select(Event.id, Event.name, Event.code, Event.is_active)
+            .where(Event.id == event_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        meta = EventMeta(*row)
+        if generation == self._generation and not db.info.get("replica"):
+            self.events.set(event_id, meta)
+        return meta
+
+    async def loket(self, db: AsyncSession, loket_id: int) -> Optional[LoketMeta]:
+        meta = self.lokets.get(loket_id)
+        if meta is not _MISSING:
+            return meta
+        generation = self._generation
+        result = await db.execute(
+            select(Loket.id, Loket.event_id, Loket.name, Loket.code, Loket.description)
+            .where(Loket.id == loket_id)
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        meta = LoketMeta(*row)
+        if generation == self._generation:
+            self.loket_events.set(loket_id, meta.event_id)
+            if not db.info.get("replica"):
+                self.lokets.set(loket_id, meta)
+        return meta
+
+    async def loket_event_id(self, db: AsyncSession, loket_id: int) -> Optional[int]:
+        """
+        Event of a loket. Cached even when read from the replica, so a
+        conditional GET keyed on the event version needs no query.
+        """
+        meta = self.lokets.get(loket_id)
+        if meta is not _MISSING:
+            return meta.event_id
+        event_id = self.loket_events.get(loket_id)
+        if event_id is not _MISSING:
+            return event_id
+        generation = self._generation
+        result = await db.execute(select(Loket.event_id).where(Loket.id == loket_id))
+        event_id = result.scalar_one_or_none()
+        if event_id is None:
+            return None
+        if generation == self._generation:
+            self.loket_events.set(loket_id, event_id)
+        return event_id
+
+    async def sound(self, db: AsyncSession, event_id: int) -> Dict[str, bool]:
+        """
+        role -> enabled for the roles configured on an event.
+        """
+        roles = self.sounds.get(event_id)
+        if roles is not _MISSING:
+            return roles
+        generation = self._generation
+        result = await db.execute(
+            select(SoundSource.role, SoundSource.enabled)
+            .where(SoundSource.event_id == event_id)
+        )
+        roles = {role: enabled for role, enabled in result.all()}
+        if generation == self._generation and not db.info.get("replica"):
+            self.sounds.set(event_id, roles)
+        return roles
+
+    # --------------------------------------------------------
+    # Invalidation
+    # --------------------------------------------------------
+
+    async def invalidate_event(self, event_id: int) -> None:
+        await self._invalidate("event", event_id)
+
+    async def invalidate_loket(self, loket_id: int) -> None:
+        await self._invalidate("loket", loket_id)
+
+    async def invalidate_sound(self, event_id: int) -> None:
+        await self._invalidate("sound", event_id)
+
+    async def _invalidate(self, kind: str, key: int) -> None:
+        self._drop(kind, key)
+        if self.backend != "redis":
+            return
+        try:
+            await redis_client.publish(CHANNEL, json.dumps({"kind": kind, "key": key}))
+        except Exception as e:
+            logger.error(f"Metadata invalidation publish failed: {e}")
+
+    def _drop(self, kind: str, key: int) -> None:
+        self._generation += 1
+        if kind == "event":
+            self.events.pop(key)
+            self.sounds.pop(key)
+        elif kind == "loket":
+            self.lokets.pop(key)
+            self.loket_events.pop(key)
+        elif kind == "sound":
+            self.sounds.pop(key)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self.events.clear()
+        self.lokets.clear()
+        self.loket_events.clear()
+        self.sounds.clear()
+
+    # --------------------------------------------------------
+    # Redis listener
+    # --------------------------------------------------------
+
+    def start(self) -> None:
+        if self.backend == "redis":
+            self._listener.start()
+
+    async def stop(self) -> None:
+        await self._listener.stop()
+
+    def _on_message(self, raw: bytes) -> None:
+        message = json.loads(raw)
+        self._drop(message["kind"], message["key"])
+
+
+metadata = MetadataCache(
+    backend=settings.broadcast_backend,
+    maxsize=settings.metadata_cache_size,
+    ttl=settings.metadata_cache_ttl,
+)
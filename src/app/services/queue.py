@@ -0,0 +1,211 @@
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select, update, func, case, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.loket import Loket
+from src.app.models.ticket import Ticket
+
+
+async def allocate_ticket_number(
+    db: AsyncSession,
+    loket_id: int,
+    event_id: int,
+    count: int = 1,
+) -> Optional[int]:
+    """
+    Increment Loket.last_ticket_number (and waiting_count) by count on the
+    database side and return the new value (the last number of the reserved
+    range), or None if the loket does not exist in the event.
+
+    The UPDATE takes the row lock on the loket, so concurrent callers are
+    serialized by the database and never receive the same number.
+    """
+    condition = (Loket.id == loket_id, Loket.event_id == event_id)
+    next_value = func.coalesce(Loket.last_ticket_number, 0) + count
+    waiting_count = Loket.waiting_count + count
+
+    if db.get_bind().dialect.update_returning:
+        # SQLite / PostgreSQL: increment + ambil nilai dalam 1 statement
+        result = await db.execute(
+            update(Loket)
+            .where(*condition)
+            .values(last_ticket_number=next_value, waiting_count=waiting_count)
+            .returning(Loket.last_ticket_number)
+            .execution_options(synchronize_session=False)
+        )
+        return result.scalar_one_or_none()
+
+    # MySQL: LAST_INSERT_ID(expr) menyimpan nilai per koneksi,
+    # jadi bisa dibaca lagi tanpa menyentuh tabel
+    result = await db.execute(
+        update(Loket)
+        .where(*condition)
+        .values(
+            last_ticket_number=func.last_insert_id(next_value),
+            waiting_count=waiting_count,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return None
+
+    result_number = await db.execute(select(func.last_insert_id()))
+    return result_number.scalar_one()
+
+
+async def claim_next_ticket(
+    db: AsyncSession,
+    loket_id: int,
+    attempts: int = 5,
+) -> Optional[int]:
+    """
+    Mark the lowest waiting ticket of a loket as called and return its
+    number, or None if nothing is waiting.
+
+    Concurrent callers on the same loket never get the same ticket and
+    never wait on each other's claimed row.
+    """
+    called_at = datetime.now(timezone.utc)
+
+    if db.get_bind().dialect.update_returning:
+        # SQLite / PostgreSQL: pilih + klaim dalam 1 UPDATE
+        waiting = (Ticket.loket_id == loket_id, Ticket.status == "waiting")
+        lowest_waiting = (
+            select(Ticket.id)
+            .where(*waiting)
+            .order_by(Ticket.number)
+            .limit(1)
+            .scalar_subquery()
+        )
+        for _ in range(attempts):
+            # status dicek lagi di UPDATE: di PostgreSQL subquery tidak
+            # dievaluasi ulang setelah menunggu lock caller lain, jadi
+            # tiket yang barusan diklaim caller itu tidak boleh cocok
+            result = await db.execute(
+                update(Ticket)
+                .where(Ticket.id == lowest_waiting, Ticket.status == "waiting")
+                .values(status="called", called_at=called_at)
+                .returning(Ticket.number)
+                .execution_options(synchronize_session=False)
+            )
+            number = result.scalar_one_or_none()
+            if number is not None:
+                return number
+            # kalah balapan atau antrian memang kosong
+            result_waiting = await db.execute(select(Ticket.id).where(*waiting).limit(1))
+            if result_waiting.first() is None:
+                return None
+        return None
+
+    # MySQL: kunci baris tiket, baris yang sedang dikunci caller lain dilewati
+    for _ in range(attempts):
+        result = await db.execute(
+            select(Ticket.id, Ticket.number)
+            .where(
+                Ticket.loket_id == loket_id,
+                Ticket.status == "waiting",
+            )
+            .order_by(Ticket.number)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        row = result.one_or_none()
+        if not row:
+            return None
+
+        claimed = await db.execute(
+            update(Ticket)
+            .where(Ticket.id == row.id, Ticket.status == "waiting")
+            .values(status="called", called_at=called_at)
+            .execution_options(synchronize_session=False)
+        )
+        if claimed.rowcount == 1:
+            return row.number
+
+    return None
+
+
+async def claim_next_tickets(db: AsyncSession, loket_ids) -> Dict[int, int]:
+    """
+    Set-based claim_next_ticket for many lokets at once. loket_ids may be a
+    list of ids or a select of ids. Returns {loket_id: called number} for
+    the lokets that had a waiting ticket.
+    """
+    called_at = datetime.now(timezone.utc)
+    lowest_per_loket = (
+        select(Ticket.loket_id, func.min(Ticket.number))
+        .where(
+            Ticket.loket_id.in_(loket_ids),
+            Ticket.status == "waiting",
+        )
+        .group_by(Ticket.loket_id)
+    )
+
+    if db.get_bind().dialect.update_returning:
+        # SQLite: semua loket diklaim dalam 1 UPDATE
+        result = await db.execute(
+            update(Ticket)
+            .where(
+                Ticket.status == "waiting",
+                tuple_(Ticket.loket_id, Ticket.number).in_(lowest_per_loket),
+            )
+            .values(status="called", called_at=called_at)
+            .returning(Ticket.loket_id, Ticket.number)
+            .execution_options(synchronize_session=False)
+        )
+        return {loket_id: number for loket_id, number in result.all()}
+
+    # MySQL: cari kandidat, kunci yang belum dikunci caller lain, lalu klaim
+    result = await db.execute(lowest_per_loket)
+    candidates = [tuple(row) for row in result.all()]
+    if not candidates:
+        return {}
+
+    result_locked = await db.execute(
+        select(Ticket.id, Ticket.loket_id, Ticket.number)
+        .where(
+            Ticket.status == "waiting",
+            tuple_(Ticket.loket_id, Ticket.number).in_(candidates),
+        )
+        .with_for_update(skip_locked=True)
+    )
+    locked = result_locked.all()
+
+    claimed: Dict[int, int] = {}
+    if locked:
+        await db.execute(
+            update(Ticket)
+            .where(Ticket.id.in_([row.id for row in locked]))
+            .values(status="called", called_at=called_at)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = {row.loket_id: row.number for row in locked}
+
+    # tiket terkecil sedang diklaim caller lain: ambil berikutnya satu per satu
+    for loket_id, _ in candidates:
+        if loket_id not in claimed:
+            number = await claim_next_ticket(db, loket_id)
+            if number is not None:
+                claimed[loket_id] = number
+
+    return claimed
+
+
+async def apply_claims(db: AsyncSession, numbers: Dict[int, int]) -> None:
+    """
+    Record claimed tickets on their lokets in one UPDATE: set
+    current_number and decrement waiting_count.
+    """
+    if not numbers:
+        return
+    await db.execute(
+        update(Loket)
+        .where(Loket.id.in_(list(numbers)))
+        .values(
+            current_number=case(numbers, value=Loket.id),
+            waiting_count=Loket.waiting_count - 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
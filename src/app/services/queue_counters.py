@@ -0,0 +1,68 @@
+"""
+Recompute the denormalized queue counters on Loket (waiting_count,
+hold_count) from the tickets table, e.g. after manual data fixes:
+
+    python -m src.app.services.queue_counters [--event-id ID] [--loket-id ID]
+"""
+import argparse
+import asyncio
+from typing import Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal, close_database
+from src.app.models.loket import Loket
+from src.app.models.ticket import Ticket
+
+
+def _count(status: str):
+    return (
+        select(func.count(Ticket.id))
+        .where(
+            Ticket.loket_id == Loket.id,
+            Ticket.status == status,
+        )
+        .scalar_subquery()
+    )
+
+
+async def recompute_counters(
+    db: AsyncSession,
+    event_id: Optional[int] = None,
+    loket_id: Optional[int] = None,
+) -> int:
+    """
+    Recompute the counters in one UPDATE and return the number of lokets
+    touched. Does not commit.
+    """
+    query = (
+        update(Loket)
+        .values(waiting_count=_count("waiting"), hold_count=_count("hold"))
+        .execution_options(synchronize_session=False)
+    )
+    if event_id is not None:
+        query = query.where(Loket.event_id == event_id)
+    if loket_id is not None:
+        query = query.where(Loket.id == loket_id)
+
+    result = await db.execute(query)
+    return result.rowcount
+
+
+async def main(event_id: Optional[int], loket_id: Optional[int]) -> None:
+    try:
+        async with AsyncSessionLocal() as session:
+            count = await recompute_counters(session, event_id, loket_id)
+            await session.commit()
+        print(f"Counter antrian dihitung ulang untuk {count} loket.")
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--event-id", type=int, default=None)
+    parser.add_argument("--loket-id", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.event_id, args.loket_id))
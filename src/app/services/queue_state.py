@@ -0,0 +1,89 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.loket import Loket
+from src.app.models.ticket import Ticket
+from src.app.schema.loket import LoketState
+from src.app.services import records, redis_queue
+from src.app.services.records import LoketRecord
+
+loket_states_adapter = TypeAdapter(List[LoketState])
+
+
+async def build_loket_states(
+    db: AsyncSession,
+    event_id: int,
+    loket_ids: Optional[Iterable[int]] = None,
+    lokets: Optional[Sequence[LoketRecord]] = None,
+) -> List[LoketState]:
+    """
+    Build the display state of the lokets of an event (optionally only
+    loket_ids) with a constant number of queries. Pass lokets when the
+    caller already loaded the loket records.
+    """
+    if lokets is None:
+        query = records.select_lokets().where(Loket.event_id == event_id)
+        if loket_ids is not None:
+            query = query.where(Loket.id.in_(list(loket_ids)))
+        lokets = await records.fetch(db, query, LoketRecord)
+
+    states: List[LoketState] = []
+
+    if redis_queue.enabled():
+        # state antrian ada di Redis, MySQL bisa sedikit tertinggal
+        for loket in lokets:
+            current_number, last_number, waiting_count, hold = (
+                await redis_queue.snapshot(db, loket.id)
+            )
+            states.append(
+                LoketState(
+                    loket_id=loket.id,
+                    loket_code=loket.code,
+                    loket_name=loket.name,
+                    loket_description=loket.description,
+                    current_number=current_number or 0,
+                    queue_length=waiting_count,
+                    last_ticket_number=last_number,
+                    last_repeat_at=loket.last_repeat_at,
+                    hold_numbers=hold,
+                )
+            )
+        return states
+
+    # jumlah waiting/hold sudah ada di counter loket; nomor HOLD untuk
+    # semua loket diambil sekaligus dalam 1 query (bukan per loket)
+    hold_numbers: Dict[int, List[int]] = defaultdict(list)
+    hold_lokets = [loket.id for loket in lokets if loket.hold_count]
+    if hold_lokets:
+        result_hold = await db.execute(
+            select(Ticket.loket_id, Ticket.number)
+            .where(
+                Ticket.event_id == event_id,
+                Ticket.status == "hold",
+                Ticket.loket_id.in_(hold_lokets),
+            )
+            .order_by(Ticket.loket_id, Ticket.number)
+        )
+        for loket_id, number in result_hold.all():
+            hold_numbers[loket_id].append(number)
+
+    for loket in lokets:
+        states.append(
+            LoketState(
+                loket_id=loket.id,
+                loket_code=loket.code,
+                loket_name=loket.name,
+                loket_description=loket.description,
+                current_number=loket.current_number or 0,
+                queue_length=loket.waiting_count or 0,
+                last_ticket_number=loket.last_ticket_number or 0,
+                last_repeat_at=loket.last_repeat_at,
+                hold_numbers=hold_numbers.get(loket.id, []),
+            )
+        )
+
+    return states
@@ -0,0 +1,79 @@
+from datetime import datetime
+from typing import AsyncIterator, List, NamedTuple, Optional, Type, TypeVar
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.models.event import Event
+from src.app.models.loket import Loket
+from src.app.models.ticket import Ticket
+
+R = TypeVar("R", bound=tuple)
+
+
+class EventRecord(NamedTuple):
+    id: int
+    name: str
+    code: str
+    is_active: Optional[bool]
+
+
+class LoketRecord(NamedTuple):
+    id: int
+    event_id: int
+    name: str
+    code: str
+    description: Optional[str]
+    current_number: Optional[int]
+    last_ticket_number: Optional[int]
+    waiting_count: int
+    hold_count: int
+    last_repeat_at: Optional[datetime]
+
+
+class TicketRecord(NamedTuple):
+    id: int
+    event_id: int
+    loket_id: int
+    number: int
+    status: Optional[str]
+    created_at: Optional[datetime]
+    called_at: Optional[datetime]
+
+
+def _select(model, record: Type[R]) -> Select:
+    # kolom diambil sesuai urutan field record
+    return select(*(getattr(model, name) for name in record._fields))
+
+
+def select_events() -> Select:
+    return _select(Event, EventRecord)
+
+
+def select_lokets() -> Select:
+    return _select(Loket, LoketRecord)
+
+
+def select_tickets() -> Select:
+    return _select(Ticket, TicketRecord)
+
+
+async def fetch(db: AsyncSession, query: Select, record: Type[R]) -> List[R]:
+    """
+    Run a select_*() query and return its rows as records: plain tuples,
+    without ORM identity map, change tracking or relationship loading.
+    """
+    result = await db.execute(query)
+    return [record._make(row) for row in result]
+
+
+async def stream(
+    db: AsyncSession, query: Select, record: Type[R], chunk_size: int
+) -> AsyncIterator[List[R]]:
+    """
+    Like fetch, but yield the records chunk_size at a time from a
+    server-side cursor.
+    """
+    result = await db.stream(query.execution_options(yield_per=chunk_size))
+    async for chunk in result.partitions():
+        yield [record._make(row) for row in chunk]
@@ -0,0 +1,373 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import AsyncSessionLocal
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.app.models.loket import Loket
+from src.app.models.ticket import Ticket
+from src.app.services.background import BackgroundTask, periodic
+
+logger = logging.getLogger(__name__)
+
+PERSIST_KEY = "queue:persist"
+PERSIST_LOCK_KEY = "queue:persist:lock"
+
+# kode balikan script Lua
+NOT_LOADED = -2
+EMPTY = -1
+
+
+def enabled() -> bool:
+    return settings.queue_engine == "redis"
+
+
+def _keys(loket_id: int) -> Tuple[str, str, str]:
+    prefix = f"queue:loket:{loket_id}"
+    return f"{prefix}:state", f"{prefix}:waiting", f"{prefix}:hold"
+
+
+# ============================================================
+# Lua scripts (atomik di Redis)
+# ============================================================
+
+_LOAD = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('DEL', KEYS[2], KEYS[3])
+redis.call('HSET', KEYS[1], 'current', ARGV[1], 'last', ARGV[2])
+for _, n in ipairs(cjson.decode(ARGV[3])) do redis.call('ZADD', KEYS[2], n, n) end
+for _, n in ipairs(cjson.decode(ARGV[4])) do redis.call('ZADD', KEYS[3], n, n) end
+return 1
+""")
+
+_ALLOCATE = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then return -2 end
+local n = redis.call('HINCRBY', KEYS[1], 'last', ARGV[2])
+redis.call('RPUSH', KEYS[2], cjson.encode({op = 'issue', loket_id = tonumber(ARGV[1]), number = n, count = tonumber(ARGV[2])}))
+return n
+""")
+
+_POP = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then return -2 end
+local popped = redis.call('ZPOPMIN', KEYS[2])
+if #popped == 0 then return -1 end
+local n = tonumber(popped[1])
+redis.call('HSET', KEYS[1], 'current', n)
+redis.call('RPUSH', KEYS[3], cjson.encode({op = 'call', loket_id = tonumber(ARGV[1]), number = n, at = ARGV[2]}))
+return n
+""")
+
+_HOLD = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then return -2 end
+local current = tonumber(redis.call('HGET', KEYS[1], 'current'))
+if not current or current == 0 then return -1 end
+redis.call('ZADD', KEYS[2], current, current)
+redis.call('HSET', KEYS[1], 'current', '')
+redis.call('RPUSH', KEYS[3], cjson.encode({op = 'hold', loket_id = tonumber(ARGV[1]), number = current}))
+return current
+""")
+
+_CALL_HELD = redis_client.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then return -2 end
+if redis.call('ZREM', KEYS[2], ARGV[2]) == 0 then return -1 end
+redis.call('HSET', KEYS[1], 'current', ARGV[2])
+redis.call('RPUSH', KEYS[3], cjson.encode({op = 'call_held', loket_id = tonumber(ARGV[1]), number = tonumber(ARGV[2])}))
+return tonumber(ARGV[2])
+""")
+
+_RELEASE_LOCK = redis_client.register_script("""
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+""")
+
+
+async def _load(db: AsyncSession, loket_id: int) -> bool:
+    """
+    Hydrate the Redis state of a loket from the database.
+    Returns False if the loket does not exist.
+    """
+    # last_ticket_number tertinggal selama op 'issue' belum di-persist,
+    # tapi baris tiketnya sudah commit: ambil yang terbesar
+    max_number = (
+        select(func.max(Ticket.number))
+        .where(Ticket.loket_id == loket_id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(Loket.current_number, Loket.last_ticket_number, max_number)
+        .where(Loket.id == loket_id)
+    )
+    row = result.one_or_none()
+    if not row:
+        return False
+    current_number, last_ticket_number, max_ticket_number = row
+
+    result_tickets = await db.execute(
+        select(Ticket.number, Ticket.status).where(
+            Ticket.loket_id == loket_id,
+            Ticket.status.in_(("waiting", "hold")),
+        )
+    )
+    waiting, hold = [], []
+    for number, status in result_tickets.all():
+        (waiting if status == "waiting" else hold).append(number)
+
+    state_key, waiting_key, hold_key = _keys(loket_id)
+    await _LOAD(
+        keys=[state_key, waiting_key, hold_key],
+        args=[
+            "" if current_number is None else current_number,
+            max(last_ticket_number or 0, max_ticket_number or 0),
+            json.dumps(waiting),
+            json.dumps(hold),
+        ],
+    )
+    return True
+
+
+async def _run(db: AsyncSession, loket_id: int, script, keys, args) -> Optional[int]:
+    """
+    Run a queue script, hydrating the loket first if it is not in Redis yet.
+    Returns None when the loket does not exist.
+    """
+    value = await script(keys=keys, args=args)
+    if value == NOT_LOADED:
+        if not await _load(db, loket_id):
+            return None
+        value = await script(keys=keys, args=args)
+    return value
+
+
+# ============================================================
+# Queue operations
+# ============================================================
+
+async def allocate_number(
+    db: AsyncSession, loket_id: int, count: int = 1
+) -> Optional[int]:
+    """
+    Reserve count numbers and return the last one of the range.
+    """
+    state_key, _, _ = _keys(loket_id)
+    return await _run(
+        db, loket_id, _ALLOCATE, [state_key, PERSIST_KEY], [loket_id, count]
+    )
+
+
+async def enqueue(loket_id: int, first_number: int, last_number: int) -> None:
+    """
+    Make issued numbers poppable. Called after the ticket rows are committed,
+    so the persister never updates a row that does not exist yet.
+    """
+    _, waiting_key, _ = _keys(loket_id)
+    await redis_client.zadd(
+        waiting_key,
+        {n: n for n in range(first_number, last_number + 1)},
+    )
+
+
+async def pop_next(db: AsyncSession, loket_id: int) -> Optional[int]:
+    state_key, waiting_key, _ = _keys(loket_id)
+    called_at = datetime.now(timezone.utc).isoformat()
+    value = await _run(
+        db, loket_id, _POP,
+        [state_key, waiting_key, PERSIST_KEY], [loket_id, called_at],
+    )
+    return None if value in (None, EMPTY) else value
+
+
+async def hold_current(db: AsyncSession, loket_id: int) -> Optional[int]:
+    state_key, _, hold_key = _keys(loket_id)
+    value = await _run(
+        db, loket_id, _HOLD, [state_key, hold_key, PERSIST_KEY], [loket_id]
+    )
+    return None if value in (None, EMPTY) else value
+
+
+async def call_held(db: AsyncSession, loket_id: int, number: int) -> Optional[int]:
+    state_key, _, hold_key = _keys(loket_id)
+    value = await _run(
+        db, loket_id, _CALL_HELD,
+        [state_key, hold_key, PERSIST_KEY], [loket_id, number],
+    )
+    return None if value in (None, EMPTY) else value
+
+
+async def snapshot(
+    db: AsyncSession, loket_id: int
+) -> Optional[Tuple[Optional[int], int, int, List[int]]]:
+    """
+    Return (current_number, last_ticket_number, waiting_count, hold_numbers).
+    """
+    state_key, waiting_key, hold_key = _keys(loket_id)
+    for _ in range(2):
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hmget(state_key, "current", "last")
+            pipe.zcard(waiting_key)
+            pipe.zrange(hold_key, 0, -1)
+            (current, last), waiting_count, hold = await pipe.execute()
+        if last is not None:
+            return (
+                int(current) if current else None,
+                int(last),
+                waiting_count,
+                [int(n) for n in hold],
+            )
+        if not await _load(db, loket_id):
+            return None
+    return None
+
+
+async def forget(loket_id: int) -> None:
+    """
+    Drop the Redis state of a loket; it is reloaded from the database on
+    next use. Pending write-behind ops should be flushed first.
+    """
+    await redis_client.delete(*_keys(loket_id))
+
+
+# ============================================================
+# Write-behind persister
+# ============================================================
+
+class QueuePersister:
+    """
+    Drains the op log written by the Lua scripts into MySQL.
+
+    Every worker runs one, but a Redis lock makes sure only one of them
+    drains at a time so ops are applied in order. Ops are removed from the
+    log only after the database commit, and applying them twice is harmless.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task = BackgroundTask(
+            lambda: periodic(self._drain, self.interval, "Queue persister")
+        )
+        self._token = uuid.uuid4().hex
+
+    def start(self) -> None:
+        self._task.start()
+
+    async def stop(self) -> None:
+        await self._task.stop()
+        await self.flush()
+
+    async def flush(self, timeout: float = 5.0) -> None:
+        """
+        Drain the whole op log. If another worker holds the lock, wait for
+        it (up to timeout seconds).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while await redis_client.llen(PERSIST_KEY) and loop.time() < deadline:
+            if await self._drain_once() == 0:
+                await asyncio.sleep(0.01)
+
+    async def _drain(self) -> None:
+        # batch penuh: sisa log diambil langsung, tanpa menunggu interval
+        while await self._drain_once() >= self.batch_size:
+            pass
+
+    async def _drain_once(self) -> int:
+        locked = await redis_client.set(
+            PERSIST_LOCK_KEY, self._token, nx=True, px=30000
+        )
+        if not locked:
+            return 0
+        try:
+            raw_ops = await redis_client.lrange(PERSIST_KEY, 0, self.batch_size - 1)
+            if not raw_ops:
+                return 0
+
+            async with AsyncSessionLocal() as session:
+                for raw in raw_ops:
+                    await _apply(session, json.loads(raw))
+                await session.commit()
+
+            await redis_client.ltrim(PERSIST_KEY, len(raw_ops), -1)
+            return len(raw_ops)
+        finally:
+            await _RELEASE_LOCK(keys=[PERSIST_LOCK_KEY], args=[self._token])
+
+
+async def _apply(session: AsyncSession, op: dict) -> None:
+    """
+    Apply one op. Loket counters only move when the ticket row actually
+    changed, so replaying an op does not make them drift.
+    """
+    loket_id = op["loket_id"]
+    number = op["number"]
+    kind = op["op"]
+
+    if kind == "issue":
+        await session.execute(
+            update(Loket)
+            .where(
+                Loket.id == loket_id,
+                func.coalesce(Loket.last_ticket_number, 0) < number,
+            )
+            .values(
+                last_ticket_number=number,
+                waiting_count=Loket.waiting_count + op.get("count", 1),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return
+
+    ticket_query = update(Ticket).where(
+        Ticket.loket_id == loket_id,
+        Ticket.number == number,
+    ).execution_options(synchronize_session=False)
+
+    if kind == "call":
+        result = await session.execute(
+            ticket_query
+            .where(Ticket.status == "waiting")
+            .values(status="called", called_at=datetime.fromisoformat(op["at"]))
+        )
+        values = {"current_number": number}
+        if result.rowcount:
+            values["waiting_count"] = Loket.waiting_count - 1
+    elif kind == "hold":
+        result = await session.execute(
+            ticket_query
+            .where(Ticket.status == "called")
+            .values(status="hold")
+        )
+        values = {"current_number": None}
+        if result.rowcount:
+            values["hold_count"] = Loket.hold_count + 1
+    elif kind == "call_held":
+        result = await session.execute(
+            ticket_query
+            .where(Ticket.status == "hold")
+            .values(status="called")
+        )
+        values = {"current_number": number}
+        if result.rowcount:
+            values["hold_count"] = Loket.hold_count - 1
+    else:
+        logger.warning(f"Unknown queue op: {op}")
+        return
+
+    await session.execute(
+        update(Loket)
+        .where(Loket.id == loket_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+
+
+persister = QueuePersister(
+    interval=settings.queue_persist_interval,
+    batch_size=settings.queue_persist_batch_size,
+)
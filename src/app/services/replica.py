@@ -0,0 +1,72 @@
+import logging
+import time
+
+from sqlalchemy import select, update
+
+from src.config.database import REPLICA_LAGS, AsyncSessionLocal, ReadSessionLocal, replica_state
+from src.config.settings import settings
+from src.app.models.replica_heartbeat import ReplicaHeartbeat
+from src.app.services.background import BackgroundTask, periodic
+
+logger = logging.getLogger(__name__)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class ReplicaMonitor:
+    """
+    Heartbeat-based replica lag check (pt-heartbeat style, works on any
+    backend): write the current time to the primary, read the last
+    replicated beat from the replica. The replica is used for reads only
+    while its lag is at most max_lag seconds; any error marks it unhealthy.
+    """
+
+    def __init__(self, interval: float, max_lag: float):
+        self.interval = interval
+        self.max_lag = max_lag
+        self._task = BackgroundTask(
+            lambda: periodic(self.check_once, self.interval, "Replica monitor", on_error=self._on_error)
+        )
+
+    def start(self) -> None:
+        if REPLICA_LAGS:
+            self._task.start()
+
+    async def stop(self) -> None:
+        await self._task.stop()
+        replica_state.healthy = False
+
+    def _on_error(self, e: Exception) -> None:
+        if replica_state.healthy:
+            logger.error(f"Read replica unavailable: {e}")
+        replica_state.healthy = False
+
+    async def check_once(self) -> None:
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(ReplicaHeartbeat)
+                .where(ReplicaHeartbeat.id == 1)
+                .values(beat_ms=_now_ms())
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                session.add(ReplicaHeartbeat(id=1, beat_ms=_now_ms()))
+            await session.commit()
+
+        async with ReadSessionLocal() as session:
+            result = await session.execute(
+                select(ReplicaHeartbeat.beat_ms).where(ReplicaHeartbeat.id == 1)
+            )
+            applied_ms = result.scalar_one_or_none() or 0
+
+        replica_state.applied_ms = applied_ms
+        replica_state.lag = round(max(_now_ms() - applied_ms, 0) / 1000, 3)
+        replica_state.healthy = replica_state.lag <= self.max_lag
+
+
+monitor = ReplicaMonitor(
+    interval=settings.read_lag_check_interval,
+    max_lag=settings.read_max_lag,
+)
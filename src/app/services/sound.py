@@ -0,0 +1,27 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app.schema.sound_source import SoundSourceConfig
+from src.app.services.metadata import metadata
+
+
+async def sound_config(db: AsyncSession, event_id: int, role: str) -> SoundSourceConfig:
+    """
+    Sound config of a display role; roles without a row use the default.
+    """
+    # kalau tidak ada spesifik → pakai default per event
+    roles = await metadata.sound(db, event_id)
+
+    if role in roles:
+        enabled = roles[role]
+    else:
+        # fallback: misal default suara ON di display, OFF di admin
+        if role in ("multi_display", "loket_display"):
+            enabled = True
+        else:
+            enabled = False
+
+    return SoundSourceConfig(
+        event_id=event_id,
+        role=role,
+        enabled=enabled,
+    )
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict
+
+from src.config.redis import redis_client
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+LOCK_TTL_MS = 2000
+LOCK_WAIT = 0.02
+LOCK_ATTEMPTS = 25
+
+
+class StateCache:
+    """
+    Read-through cache in Redis for the display read endpoints (event state,
+    loket info), holding the encoded JSON body.
+
+    Keys carry the event version (see versions.py), which every write bumps
+    after its commit: a write makes exactly the entries of its event
+    unreachable, and an entry can never be older than the version it is
+    stored under because the version is read before the data. The TTL only
+    cleans up superseded entries (and bounds the damage of a missed bump).
+
+    Stampede protection: concurrent misses for a key share one load within a
+    worker, and across workers a short Redis lock lets one worker load while
+    the others wait for its result.
+    """
+
+    def __init__(self, enabled: bool = False, ttl: int = 5):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    async def fetch(
+        self,
+        key: str,
+        version: int,
+        load: Callable[[], Awaitable[bytes]],
+    ) -> bytes:
+        if not self.enabled:
+            return await load()
+
+        key = f"cache:{key}:{version}"
+        try:
+            body = await redis_client.get(key)
+        except Exception as e:
+            self._unavailable(e)
+            return await load()
+        if body is not None:
+            self.hits += 1
+            return body
+
+        self.misses += 1
+        future = self._loading.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            body = await self._load(key, load)
+            future.set_result(body)
+            return body
+        except BaseException as e:
+            future.set_exception(e)
+            # hindari "exception was never retrieved" kalau tidak ada yang menunggu
+            future.exception()
+            raise
+        finally:
+            del self._loading[key]
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[bytes]]) -> bytes:
+        lock = f"{key}:lock"
+        try:
+            locked = await redis_client.set(lock, 1, nx=True, px=LOCK_TTL_MS)
+            if not locked:
+                # worker lain sedang memuat: tunggu hasilnya sebentar
+                for _ in range(LOCK_ATTEMPTS):
+                    await asyncio.sleep(LOCK_WAIT)
+                    body = await redis_client.get(key)
+                    if body is not None:
+                        return body
+        except Exception as e:
+            self._unavailable(e)
+            return await load()
+
+        try:
+            body = await load()
+            try:
+                await redis_client.set(key, body, ex=self.ttl)
+            except Exception as e:
+                self._unavailable(e)
+            return body
+        finally:
+            if locked:
+                try:
+                    await redis_client.delete(lock)
+                except Exception as e:
+                    self._unavailable(e)
+
+    def _unavailable(self, e: Exception) -> None:
+        # cache tidak boleh membuat read gagal: langsung ke database
+        self.errors += 1
+        logger.warning(f"State cache unavailable: {e}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+state_cache = StateCache(enabled=settings.cache_enabled, ttl=settings.cache_ttl)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from src.config.redis import redis_client
+from src.config.settings import settings
+from src.app.services.background import BackgroundTask, listen
+from src.app.services.metadata import LRUCache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "queue:versions"
+
+
+# versi = max(versi + 1, sekarang dalam ms), lalu bangunkan long-poll
+_BUMP = redis_client.register_script("""
+local version = tonumber(redis.call('GET', KEYS[1]) or '0') + 1
+local now = tonumber(ARGV[1])
+if now > version then version = now end
+redis.call('SET', KEYS[1], version)
+redis.call('PUBLISH', ARGV[2], ARGV[3])
+return version
+""")
+
+
+def _key(event_id: int) -> str:
+    return f"queue:event:{event_id}:version"
+
+
+class EventVersions:
+    """
+    Per-event version counter, bumped after every committed mutation of the
+    event (its lokets, tickets and sound config). Used as the ETag of the
+    display GET endpoints so an unchanged poll is answered without the DB.
+
+    A bump sets the version to max(version + 1, now in ms), so a version is
+    also (an upper bound of) the time of the last change: a restarted worker
+    (memory backend) or an evicted Redis key never hands out an ETag a
+    client may already hold for different data, and a read replica can be
+    checked against it (see ReplicaMonitor). Follows BROADCAST_BACKEND: with several
+    workers the counter has to live in Redis, and bumps are published so
+    long-poll waiters on every worker wake up.
+
+    get() runs before the endpoint checks that the event exists, so the
+    seed of a never-bumped event is only kept for seed_ttl seconds (and,
+    in memory, for at most seed_maxsize events); a re-seed is a later time,
+    so clients just get one more 200.
+    """
+
+    def __init__(self, backend: str = "memory", seed_ttl: int = 3600, seed_maxsize: int = 10000):
+        self.backend = backend
+        self.seed_ttl = seed_ttl
+        self._versions: Dict[int, int] = {}
+        self._seeds = LRUCache(seed_maxsize, seed_ttl)
+        self._changed: Dict[int, asyncio.Event] = {}
+        self._listener = BackgroundTask(
+            lambda: listen(
+                CHANNEL,
+                lambda raw: self._notify(int(raw)),
+                "Version listener",
+                on_subscribe=self._notify_all,
+            )
+        )
+
+    async def get(self, event_id: int) -> int:
+        if self.backend != "redis":
+            version = self._versions.get(event_id)
+            if version is None:
+                version = self._seeds.get(event_id, None)
+            if version is None:
+                version = _now_ms()
+                self._seeds.set(event_id, version)
+            return version
+        version = await redis_client.get(_key(event_id))
+        if version is not None:
+            return int(version)
+        # bump menimpa kunci dengan SET biasa, sehingga TTL seed hilang
+        seed = _now_ms()
+        await redis_client.set(_key(event_id), seed, nx=True, ex=self.seed_ttl)
+        version = await redis_client.get(_key(event_id))
+        return seed if version is None else int(version)
+
+    async def bump(self, event_id: int) -> None:
+        if self.backend != "redis":
+            previous = self._versions.get(event_id) or self._seeds.get(event_id, 0)
+            self._versions[event_id] = max(previous + 1, _now_ms())
+            self._seeds.pop(event_id)
+            self._notify(event_id)
+            return
+        await _BUMP(keys=[_key(event_id)], args=[_now_ms(), CHANNEL, event_id])
+
+    async def wait(self, event_id: int, since: int, timeout: float) -> int:
+        """
+        Current version of the event, waiting up to timeout seconds for it
+        to differ from since. Holds nothing but an asyncio.Event while parked.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            # ambil Event sebelum membaca versi supaya bump di antaranya
+            # tidak terlewat
+            changed = self._changed.setdefault(event_id, asyncio.Event())
+            version = await self.get(event_id)
+            remaining = deadline - loop.time()
+            if version != since or remaining <= 0:
+                return version
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                return await self.get(event_id)
+
+    def _notify(self, event_id: int) -> None:
+        changed = self._changed.pop(event_id, None)
+        if changed is not None:
+            changed.set()
+
+    # --------------------------------------------------------
+    # Redis listener
+    # --------------------------------------------------------
+
+    def start(self) -> None:
+        if self.backend == "redis":
+            self._listener.start()
+
+    async def stop(self) -> None:
+        await self._listener.stop()
+
+    def _notify_all(self) -> None:
+        # bump bisa terlewat selama (re)connect: bangunkan semua waiter,
+        # mereka membaca ulang versinya sendiri
+        for event_id in list(self._changed):
+            self._notify(event_id)
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    304 response if the request's If-None-Match matches, else None.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+versions = EventVersions(
+    backend=settings.broadcast_backend,
+    seed_ttl=settings.version_seed_ttl,
+    seed_maxsize=settings.metadata_cache_size,
+)
@@ -1,19 +1,146 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from ..config.settings import settings
 import logging
-from typing import AsyncGenerator
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Optional
+from fastapi import Request
 
 logger = logging.getLogger(__name__)
 
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long it takes to get a connection: the wait
+    for a free one when the pool is saturated, or the connect of a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.connects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _create_connection(self):
+        self.connects += 1
+        return super()._create_connection()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += waited
+            if waited > self.wait_max:
+                self.wait_max = waited
+
+    def stats(self) -> dict:
+        capacity = self.size() + self._max_overflow
+        checked_out = self.checkedout()
+        return {
+            "pool": "queue",
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "saturation": round(checked_out / capacity, 4) if capacity > 0 else None,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "checkout_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "checkout_max_ms": round(self.wait_max * 1000, 3),
+            "timeouts": self.timeouts,
+        }
+
+
+def _engine_options() -> dict:
+    if settings.db_pool_class == "null":
+        # koneksi baru per request (mis. di belakang proxy pooling eksternal)
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+
+
+def _sqlite_pragmas(reader: bool) -> list:
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.sqlite_busy_timeout}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous}",
+        f"PRAGMA cache_size = -{settings.sqlite_cache_size_kb}",
+        f"PRAGMA mmap_size = {settings.sqlite_mmap_size}",
+        "PRAGMA temp_store = MEMORY",
+        "PRAGMA foreign_keys = ON",
+    ]
+    if reader:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # WAL: reader tidak memblok writer dan sebaliknya; tersimpan di file
+        pragmas.insert(0, "PRAGMA journal_mode = WAL")
+    return pragmas
+
+
+def _create_sqlite_engine(pool_size: int, reader: bool) -> AsyncEngine:
+    """
+    Engine for the embedded SQLite mode. The writer engine has exactly one
+    connection, so writes queue up in the pool (FIFO) instead of fighting
+    over the database lock; readers get their own pool and, thanks to WAL,
+    always see the last committed write without blocking it.
+
+    This serializes writes, it does not batch them: every request still
+    commits its own transaction. With synchronous=NORMAL in WAL mode a
+    commit is not fsynced; the WAL is synced at checkpoint, so a power
+    loss can drop the last commits (the file stays consistent).
+    """
+    if not settings.database_url:
+        os.makedirs(os.path.dirname(settings.sqlite_path) or ".", exist_ok=True)
+    sqlite_engine = create_async_engine(
+        settings.async_database_url,
+        echo=settings.debug,
+        future=True,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    pragmas = _sqlite_pragmas(reader)
+
+    @event.listens_for(sqlite_engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return sqlite_engine
+
+
 # Create async engine
-engine = create_async_engine(
-    settings.async_database_url,
-    poolclass=NullPool,
-    echo=settings.debug,
-    future=True
-)
+if settings.is_sqlite:
+    engine = _create_sqlite_engine(pool_size=1, reader=False)
+else:
+    engine = create_async_engine(
+        settings.async_database_url,
+        echo=settings.debug,
+        future=True,
+        **_engine_options()
+    )
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -22,6 +149,65 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+# Read engine for read-only endpoints (see get_read_database): an optional
+# read replica, or else the reader pool of the embedded SQLite mode
+if settings.read_database_url:
+    read_engine = create_async_engine(
+        settings.async_read_database_url,
+        echo=settings.debug,
+        future=True,
+        **_engine_options()
+    )
+elif settings.is_sqlite:
+    read_engine = _create_sqlite_engine(pool_size=settings.sqlite_reader_pool_size, reader=True)
+else:
+    read_engine = None
+
+# replica bisa tertinggal dari primary; reader SQLite (file yang sama) tidak
+REPLICA_LAGS = bool(settings.read_database_url)
+
+ReadSessionLocal = (
+    async_sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        info={"replica": REPLICA_LAGS},
+    )
+    if read_engine is not None
+    else None
+)
+
+# sesi baca yang selalu melihat commit terakhir (untuk broadcast/snapshot):
+# reader SQLite kalau ada, bukan replica MySQL yang bisa tertinggal
+ConsistentReadSessionLocal = (
+    ReadSessionLocal if ReadSessionLocal is not None and not REPLICA_LAGS
+    else AsyncSessionLocal
+)
+
+# cookie penanda "baru saja menulis": baca dari primary sampai waktu ini
+STICKY_COOKIE = "read_primary_until"
+
+
+class ReplicaState:
+    """
+    How far the replica has applied, as last measured by ReplicaMonitor.
+    """
+
+    def __init__(self):
+        self.applied_ms = 0
+        self.lag: Optional[float] = None
+        self.healthy = False
+
+    def stats(self) -> dict:
+        return {
+            "configured": REPLICA_LAGS,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+        }
+
+
+replica_state = ReplicaState()
+
 # Create declarative base
 Base = declarative_base()
 
@@ -40,6 +226,84 @@ async def get_database() -> AsyncGenerator[AsyncSession, None]:
         finally:
             await session.close()
 
+def _use_replica(request: Request) -> bool:
+    if ReadSessionLocal is None:
+        return False
+    if not REPLICA_LAGS:
+        return True
+    if not replica_state.healthy:
+        return False
+    until = request.cookies.get(STICKY_COOKIE)
+    if until:
+        try:
+            if float(until) > time.time():
+                return False
+        except ValueError:
+            pass
+    return True
+
+
+def read_sessionmaker(request: Request) -> async_sessionmaker:
+    """
+    Session factory for read-only work of this request (see
+    get_read_database), for sessions that outlive the dependency such as
+    those of streamed responses.
+    """
+    return ReadSessionLocal if _use_replica(request) else AsyncSessionLocal
+
+
+async def get_read_database(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get a session for read-only endpoints: on the SQLite reader
+    pool in embedded mode; on the read replica when one is configured and
+    not lagging, and the client has not written recently; otherwise on the
+    primary.
+    """
+    async with read_sessionmaker(request)() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+async def get_consistent_read_database() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency to get a read-only session that sees the latest commit (see
+    ConsistentReadSessionLocal): the SQLite reader pool in embedded mode,
+    otherwise the primary. For snapshots that must line up with broadcasts
+    and for rows a client just created.
+    """
+    async with ConsistentReadSessionLocal() as session:
+        try:
+            yield session
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+
+@asynccontextmanager
+async def fresh_session(db: AsyncSession, version: int) -> AsyncIterator[AsyncSession]:
+    """
+    Session to read data that is served or cached under version (an event
+    version, i.e. a time in ms): db itself, unless db is on a replica that
+    has not applied everything up to version; then a new primary session.
+    """
+    if not db.info.get("replica") or replica_state.applied_ms >= version:
+        yield db
+        return
+    # koneksi replica dilepas, sesi db sendiri tidak diubah
+    await db.close()
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
 # In database.py
 async def get_raw_session() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -59,8 +323,24 @@ async def init_database():
         await conn.run_sync(Base.metadata.create_all)
 
 
+def pool_stats() -> dict:
+    """
+    Connection pool metrics of this worker
+    """
+    pool = engine.pool
+    if isinstance(pool, TimedQueuePool):
+        stats = pool.stats()
+    else:
+        stats = {"pool": "null"}
+    if read_engine is not None and isinstance(read_engine.pool, TimedQueuePool):
+        stats["read"] = read_engine.pool.stats()
+    return stats
+
+
 async def close_database():
     """
     Close database connections
     """
     await engine.dispose()
+    if read_engine is not None:
+        await read_engine.dispose()
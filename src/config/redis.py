@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 # Create Redis connection pool
 redis_pool = redis.ConnectionPool.from_url(settings.redis_url)
 
+# Shared client on top of the pool
+redis_client = redis.Redis(connection_pool=redis_pool)
+
 
 async def get_redis() -> redis.Redis:
     """
@@ -1,3 +1,4 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -12,20 +13,94 @@ class Settings(BaseSettings):
     app_url: Optional[str] = None
     app_path: Optional[str] = None
 
-    # Database
+    # Database: "mysql" atau "sqlite" (embedded, 1 mesin per hall tanpa
+    # server MySQL; DATABASE_URL=sqlite://... juga mengaktifkan mode ini)
+    db_driver: str = "mysql"
     db_host: str = "localhost"
     db_port: int = 3306
-    db_user: str
-    db_password: str
-    db_name: str
+    db_user: Optional[str] = None
+    db_password: Optional[str] = None
+    db_name: Optional[str] = None
     database_url: Optional[str] = None
 
+    # SQLite embedded: file database, pragma, dan jumlah koneksi reader
+    # (writer selalu 1 koneksi)
+    sqlite_path: str = "data/queue.db"
+    sqlite_reader_pool_size: int = 4
+    sqlite_busy_timeout: int = 5000
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_cache_size_kb: int = 16384
+    sqlite_mmap_size: int = 268435456
+
+    # Connection pool: "queue" (pool per worker) atau "null" (koneksi baru
+    # per request, mis. kalau sudah ada ProxySQL/pgbouncer di depan DB)
+    db_pool_class: str = "queue"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    # detik; di bawah wait_timeout MySQL supaya koneksi idle tidak diputus server
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_pool_timeout: float = 30.0
+
+    # Read replica (opsional) untuk endpoint read-only
+    read_database_url: Optional[str] = None
+    # replica dipakai hanya kalau tertinggal paling lama sekian detik
+    read_max_lag: float = 5.0
+    read_lag_check_interval: float = 1.0
+    # setelah client menulis, bacaannya ke primary selama sekian detik
+    read_sticky_seconds: float = 5.0
+
     # Redis
     redis_url: str = "redis://localhost:6379/0"
     redis_password: Optional[str] = None
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db: int = 0
+
+    # Queue engine: "database" (MySQL saja) atau "redis" (state antrian di
+    # Redis, MySQL di-update oleh write-behind persister)
+    queue_engine: str = "database"
+    queue_persist_interval: float = 0.2
+    queue_persist_batch_size: int = 500
+
+    # Broadcast perubahan ke display: "memory" (1 worker) atau "redis"
+    # (pub/sub, untuk banyak worker uvicorn)
+    broadcast_backend: str = "memory"
+
+    # Cache Redis untuk state event / info loket (kunci ikut versi event,
+    # jadi untuk banyak worker BROADCAST_BACKEND harus "redis")
+    cache_enabled: bool = False
+    cache_ttl: int = 5
+
+    # Cache metadata (nama/kode event & loket, konfigurasi suara) per worker
+    metadata_cache_size: int = 10000
+    metadata_cache_ttl: float = 60.0
+
+    # Versi awal event yang belum pernah berubah (ETag) disimpan sekian
+    # detik; id event yang tidak ada tidak menumpuk selamanya
+    version_seed_ttl: int = 3600
+
+    # Antrian announcement (panggilan/repeat untuk display): dibatasi umur
+    # (detik) dan jumlah per event, dipangkas berkala
+    announcement_max_age: int = 3600
+    announcement_max_per_event: int = 1000
+    announcement_trim_interval: float = 60.0
+
+    # Export di-stream per batch sekian baris dari cursor database;
+    # level gzip untuk format csv.gz / ndjson.gz (1 cepat .. 9 kecil)
+    export_chunk_size: int = 1000
+    export_gzip_level: int = 6
+
+    # Export di background (POST /exports): artefak di export_dir, dipakai
+    # ulang untuk export yang sama dan dihapus setelah export_job_ttl detik.
+    # Worker: python -m src.app.services.export_jobs, atau inline di proses
+    # API. Worker dibangunkan lewat polling database atau list Redis.
+    export_dir: str = "data/exports"
+    export_job_ttl: int = 3600
+    export_worker_inline: bool = False
+    export_poll_interval: float = 1.0
+    export_stale_after: float = 60.0
+    export_wakeup_backend: str = "database"
     
     # CORS
     allowed_origins: list = ["*"]
@@ -37,11 +112,33 @@ class Settings(BaseSettings):
     log_dir: str = "logs"
     log_file: str = "logs/app.log"
 
+    @model_validator(mode="after")
+    def _check_database(self):
+        if not self.is_sqlite and not self.database_url and not (self.db_user and self.db_name):
+            raise ValueError("DB_USER and DB_NAME (or DATABASE_URL) are required for MySQL")
+        return self
+
+    @property
+    def is_sqlite(self) -> bool:
+        if self.database_url:
+            return self.database_url.startswith("sqlite")
+        return self.db_driver == "sqlite"
+
+    @property
+    def async_read_database_url(self) -> Optional[str]:
+        if self.read_database_url:
+            return self.read_database_url.replace("mysql://", "mysql+aiomysql://")
+        return None
+
     @property
     def async_database_url(self) -> str:
         if self.database_url:
+            if self.database_url.startswith("sqlite://"):
+                return self.database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
             return self.database_url.replace("mysql://", "mysql+aiomysql://")
-        return f"mysql+aiomysql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
+        if self.db_driver == "sqlite":
+            return f"sqlite+aiosqlite:///{self.sqlite_path}"
+        return f"mysql+aiomysql://{self.db_user}:{self.db_password or ''}@{self.db_host}:{self.db_port}/{self.db_name}"
 
     
     class Config:
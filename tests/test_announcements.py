@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from conftest import API, create_loket
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_get_contiguous_seq_per_event(client, queue_engine):
+    event_id, loket_id = await create_loket(client, tickets=30)
+    other_event_id, other_loket_id = await create_loket(client, tickets=5)
+
+    responses = await asyncio.gather(
+        *[client.post(f"{API}/lokets/{loket_id}/next") for _ in range(30)],
+        *[client.post(f"{API}/lokets/{other_loket_id}/next") for _ in range(5)],
+    )
+    assert {r.status_code for r in responses} == {200}
+
+    # seq per event, tanpa celah: display yang polling ?after=N tidak
+    # pernah melewatkan panggilan
+    items = (await client.get(f"{API}/events/{event_id}/announcements", params={"after": 0})).json()
+    assert [item["seq"] for item in items] == list(range(1, 31))
+    assert sorted(item["number"] for item in items) == list(range(1, 31))
+
+    after = (await client.get(f"{API}/events/{event_id}/announcements", params={"after": 25})).json()
+    assert [item["seq"] for item in after] == list(range(26, 31))
+
+    other = (await client.get(f"{API}/events/{other_event_id}/announcements", params={"after": 0})).json()
+    assert [item["seq"] for item in other] == list(range(1, 6))
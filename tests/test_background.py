@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.app.services import background
+from src.config.redis import redis_client
+
+
+@pytest.mark.asyncio
+async def test_periodic_keeps_running_after_an_error():
+    calls = []
+    errors = []
+
+    async def step():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    task = background.BackgroundTask(
+        lambda: background.periodic(step, 0, "test", on_error=errors.append)
+    )
+    task.start()
+    while len(calls) < 3:
+        await asyncio.sleep(0)
+    await task.stop()
+
+    assert not task.running
+    assert [str(e) for e in errors] == ["boom"]
+
+
+@pytest.mark.asyncio
+async def test_listen_resubscribes_after_an_error():
+    subscribed = []
+    received = []
+
+    def on_message(data):
+        if data == b"bad":
+            raise ValueError(data)
+        received.append(data)
+
+    task = background.BackgroundTask(
+        lambda: background.listen("test:channel", on_message, "test", on_subscribe=lambda: subscribed.append(1))
+    )
+    task.start()
+
+    async def publish(data):
+        # tunggu sampai listener (kembali) subscribe
+        while not await redis_client.publish("test:channel", data):
+            await asyncio.sleep(0.01)
+
+    await publish(b"one")
+    await publish(b"bad")
+    # listener tidur 1 detik sebelum subscribe ulang
+    await asyncio.sleep(1.1)
+    await publish(b"two")
+    while len(received) < 2:
+        await asyncio.sleep(0.01)
+    await task.stop()
+
+    assert received == [b"one", b"two"]
+    assert len(subscribed) == 2
@@ -0,0 +1,49 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from conftest import API, create_loket
+from src.config.database import AsyncSessionLocal
+from src.config.settings import settings
+from src.app.models.export_job import ExportJob
+from src.app.services import export_jobs
+
+
+@pytest.mark.asyncio
+async def test_stale_reclaim_fences_out_the_first_worker(client):
+    event_id, _ = await create_loket(client, tickets=3)
+    response = await client.post(f"{API}/exports", json={"kind": "lokets", "event_id": event_id})
+    job_id = response.json()["id"]
+    os.makedirs(settings.export_dir, exist_ok=True)
+    worker = export_jobs.ExportWorker(poll_interval=1, stale_after=60, ttl=3600)
+
+    first = await worker.claim()
+    assert (first.id, first.attempt) == (job_id, 1)
+
+    # worker pertama macet: heartbeat basi, job diklaim ulang
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(ExportJob)
+            .where(ExportJob.id == job_id)
+            .values(updated_at=datetime.utcnow() - timedelta(seconds=120))
+        )
+        await session.commit()
+    second = await worker.claim()
+    assert (second.id, second.attempt) == (job_id, 2)
+
+    await worker.run(first)
+    assert (await client.get(f"{API}/exports/{job_id}")).json()["status"] == "running"
+
+    await worker.run(second)
+    assert (await client.get(f"{API}/exports/{job_id}")).json()["status"] == "done"
+
+    # pekerjaan attempt pertama yang terlambat tetap ditolak
+    await worker.run(first)
+    assert sorted(f for f in os.listdir(settings.export_dir) if f.startswith(job_id)) == [
+        f"{job_id}.2"
+    ]
+    download = await client.get(f"{API}/exports/{job_id}/download")
+    assert download.status_code == 200
+    assert download.text.count("\n") == 2
@@ -0,0 +1,25 @@
+import pytest
+
+from conftest import API, create_loket
+
+
+@pytest.mark.asyncio
+async def test_delete_loket_with_waiting_ticket_is_refused(client, queue_engine):
+    event_id, loket_id = await create_loket(client)
+    await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+
+    # langsung setelah tiket dibuat: di mode redis counter loket belum diupdate
+    response = await client.delete(f"{API}/events/{event_id}/lokets/{loket_id}")
+
+    assert response.status_code == 400
+    assert (await client.get(f"{API}/lokets/{loket_id}/info")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_delete_empty_loket(client, queue_engine):
+    event_id, loket_id = await create_loket(client)
+
+    response = await client.delete(f"{API}/events/{event_id}/lokets/{loket_id}")
+
+    assert response.status_code == 204
+    assert (await client.get(f"{API}/lokets/{loket_id}/info")).status_code == 404
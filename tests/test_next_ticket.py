@@ -0,0 +1,73 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import mysql
+
+from conftest import API, create_loket
+from src.config.database import AsyncSessionLocal, engine
+from src.app.services.queue import claim_next_ticket
+
+
+@pytest.mark.asyncio
+async def test_concurrent_next_claims_each_ticket_once(client):
+    _, loket_id = await create_loket(client, tickets=120)
+    semaphore = asyncio.Semaphore(20)
+
+    async def call_next():
+        async with semaphore:
+            return await client.post(f"{API}/lokets/{loket_id}/next")
+
+    started = time.perf_counter()
+    responses = await asyncio.gather(*[call_next() for _ in range(130)])
+    elapsed = time.perf_counter() - started
+
+    assert {r.status_code for r in responses} == {200}
+    numbers = [r.json()["called_number"] for r in responses]
+    claimed = [n for n in numbers if n is not None]
+    duplicates = len(claimed) - len(set(claimed))
+    print(f"{len(responses) / elapsed:.0f} claims/s, {duplicates} duplicates")
+
+    assert duplicates == 0
+    assert sorted(claimed) == list(range(1, 121))
+    # 10 panggilan terakhir mendapati antrian kosong
+    assert numbers.count(None) == 10
+
+    info = (await client.get(f"{API}/lokets/{loket_id}/info")).json()
+    assert info["queue_length"] == 0
+
+
+@pytest.mark.asyncio
+async def test_skip_locked_claims_each_ticket_once(client, monkeypatch):
+    _, loket_id = await create_loket(client, tickets=40)
+    # jalur MySQL (SELECT ... FOR UPDATE SKIP LOCKED + UPDATE bersyarat);
+    # SQLite mengabaikan FOR UPDATE, penulisan diserialkan koneksi writer
+    monkeypatch.setattr(engine.dialect, "update_returning", False)
+
+    async def claim():
+        async with AsyncSessionLocal() as session:
+            number = await claim_next_ticket(session, loket_id)
+            await session.commit()
+            return number
+
+    numbers = await asyncio.gather(*[claim() for _ in range(45)])
+
+    claimed = [n for n in numbers if n is not None]
+    assert sorted(claimed) == list(range(1, 41))
+    assert numbers.count(None) == 5
+
+
+def test_skip_locked_query_on_mysql():
+    statements = []
+
+    class Session:
+        def get_bind(self):
+            return SimpleNamespace(dialect=SimpleNamespace(update_returning=False))
+
+        async def execute(self, statement):
+            statements.append(str(statement.compile(dialect=mysql.dialect())))
+            return SimpleNamespace(one_or_none=lambda: None)
+
+    assert asyncio.run(claim_next_ticket(Session(), 1)) is None
+    assert statements[0].endswith("FOR UPDATE SKIP LOCKED")
@@ -0,0 +1,102 @@
+"""
+The queue endpoints with both QUEUE_ENGINE values: responses, /info and,
+once the write-behind log is flushed, the database rows must agree.
+"""
+import pytest
+from sqlalchemy import delete, select
+
+from conftest import API, create_loket
+from src.config.database import AsyncSessionLocal
+from src.app.models.loket import Loket
+from src.app.models.ticket import Ticket
+from src.app.services import redis_queue
+from src.app.services.metadata import metadata
+
+
+async def _db_state(loket_id):
+    if redis_queue.enabled():
+        await redis_queue.persister.flush()
+    async with AsyncSessionLocal() as session:
+        loket = (await session.execute(select(Loket).where(Loket.id == loket_id))).scalar_one()
+        result = await session.execute(
+            select(Ticket.number, Ticket.status)
+            .where(Ticket.loket_id == loket_id)
+            .order_by(Ticket.number)
+        )
+        return (
+            loket.current_number,
+            loket.last_ticket_number,
+            loket.waiting_count,
+            loket.hold_count,
+            dict(result.all()),
+        )
+
+
+@pytest.mark.asyncio
+async def test_issue_next_hold_call_held(client, queue_engine):
+    event_id, loket_id = await create_loket(client, tickets=3)
+
+    response = await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+    assert response.json()["number"] == 4
+
+    assert (await client.post(f"{API}/lokets/{loket_id}/next")).json()["called_number"] == 1
+    assert (await client.post(f"{API}/lokets/{loket_id}/hold")).status_code == 200
+    assert (await client.post(f"{API}/lokets/{loket_id}/next")).json()["called_number"] == 2
+
+    info = (await client.get(f"{API}/lokets/{loket_id}/info")).json()
+    assert (info["current_number"], info["queue_length"], info["hold_numbers"]) == (2, 2, [1])
+
+    response = await client.post(f"{API}/lokets/{loket_id}/hold/1/call")
+    assert response.json()["called_number"] == 1
+    assert (await client.post(f"{API}/lokets/{loket_id}/hold/1/call")).status_code == 404
+
+    info = (await client.get(f"{API}/lokets/{loket_id}/info")).json()
+    assert (info["current_number"], info["queue_length"], info["hold_numbers"]) == (1, 2, [])
+
+    assert await _db_state(loket_id) == (
+        1, 4, 2, 0, {1: "called", 2: "called", 3: "waiting", 4: "waiting"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_reset_then_issue_starts_at_one(client, queue_engine):
+    event_id, loket_id = await create_loket(client, tickets=3)
+    await client.post(f"{API}/lokets/{loket_id}/next")
+
+    response = await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/reset")
+    assert response.status_code == 200
+
+    response = await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+    assert response.json()["number"] == 1
+    assert await _db_state(loket_id) == (0, 1, 1, 0, {1: "waiting"})
+
+
+@pytest.mark.asyncio
+async def test_issue_after_redis_state_lost(client, monkeypatch):
+    monkeypatch.setattr(redis_queue.settings, "queue_engine", "redis")
+    event_id, loket_id = await create_loket(client, tickets=3)
+
+    # state Redis hilang sebelum op 'issue' di-persist: nomor tidak boleh
+    # dipakai ulang walau last_ticket_number di DB masih 0
+    await redis_queue.forget(loket_id)
+    response = await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+    assert response.json()["number"] == 4
+
+    await redis_queue.persister.flush()
+    assert (await _db_state(loket_id))[1:3] == (4, 4)
+
+
+@pytest.mark.asyncio
+async def test_issue_on_loket_deleted_by_another_worker(client, queue_engine):
+    event_id, loket_id = await create_loket(client)
+    # isi cache metadata, lalu hapus loket tanpa invalidasi (worker lain)
+    await client.post(f"{API}/lokets/{loket_id}/next")
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Loket).where(Loket.id == loket_id))
+        await session.commit()
+    await redis_queue.forget(loket_id)
+
+    response = await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+    assert response.status_code == 404
+    # SQLite memakai ulang id loket terakhir untuk loket baru
+    await metadata.invalidate_loket(loket_id)
@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config.database import engine, fresh_session, read_engine, replica_state
+
+
+@pytest.mark.asyncio
+async def test_lagging_replica_reads_move_to_a_new_primary_session(database, monkeypatch):
+    # reader SQLite berperan sebagai replica yang sudah sampai versi 1000
+    replica = async_sessionmaker(read_engine, class_=AsyncSession, info={"replica": True})
+    monkeypatch.setattr(replica_state, "applied_ms", 1000)
+
+    async with replica() as db:
+        async with fresh_session(db, 1000) as session:
+            assert session is db
+
+        async with fresh_session(db, 2000) as session:
+            assert session is not db
+            assert session.get_bind() is engine.sync_engine
+            assert (await session.execute(select(1))).scalar_one() == 1
+
+        # sesi replica tidak di-rebind
+        assert db.get_bind() is read_engine.sync_engine
+        assert db.info["replica"]
@@ -0,0 +1,116 @@
+"""
+Redis read-through cache of event state / loket info (fakeredis): reads
+interleaved with writes must always match a fresh database load.
+"""
+import asyncio
+import random
+
+import pytest
+
+from conftest import API
+from src.config.database import AsyncSessionLocal
+from src.app.api import events as events_api
+from src.app.api.tickets import _loket_info
+from src.app.services.queue_state import build_loket_states
+from src.app.services.state_cache import state_cache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(state_cache, "enabled", True)
+    return state_cache
+
+
+async def _db_state(event_id):
+    async with AsyncSessionLocal() as session:
+        return [s.model_dump(mode="json") for s in await build_loket_states(session, event_id)]
+
+
+async def _db_info(loket_id):
+    async with AsyncSessionLocal() as session:
+        return (await _loket_info(session, loket_id)).model_dump(mode="json")
+
+
+async def _create_event(client, lokets):
+    event_id = (await client.post(f"{API}/events", json={"name": "E", "code": f"C{random.random()}"})).json()["id"]
+    loket_ids = [
+        (await client.post(f"{API}/events/{event_id}/lokets", json={"name": f"L{i}", "code": str(i)})).json()["id"]
+        for i in range(lokets)
+    ]
+    return event_id, loket_ids
+
+
+@pytest.mark.asyncio
+async def test_interleaved_writes_and_reads_match_database(client, cache):
+    rng = random.Random(13)
+    event_id, loket_ids = await _create_event(client, 3)
+    hits = cache.hits
+
+    for _ in range(150):
+        loket_id = rng.choice(loket_ids)
+        op = rng.choice(["ticket", "ticket", "next", "hold", "repeat", "read", "read"])
+        if op == "ticket":
+            await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+        elif op == "next":
+            await client.post(f"{API}/lokets/{loket_id}/next")
+        elif op == "hold":
+            await client.post(f"{API}/lokets/{loket_id}/hold")
+        elif op == "repeat":
+            await client.post(f"{API}/lokets/{loket_id}/repeat")
+
+        state = (await client.get(f"{API}/events/{event_id}/state")).json()
+        info = (await client.get(f"{API}/lokets/{loket_id}/info")).json()
+        assert state == await _db_state(event_id)
+        assert info == await _db_info(loket_id)
+
+    # bacaan tanpa tulisan di antaranya dilayani dari cache
+    assert cache.hits > hits
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_and_reads_settle_on_database(client, cache):
+    event_id, loket_ids = await _create_event(client, 3)
+
+    async def writer():
+        for _ in range(20):
+            loket_id = random.choice(loket_ids)
+            await client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+            await client.post(f"{API}/lokets/{loket_id}/next")
+
+    async def reader():
+        for _ in range(40):
+            response = await client.get(f"{API}/events/{event_id}/state")
+            assert response.status_code == 200
+
+    await asyncio.gather(*[writer() for _ in range(3)], *[reader() for _ in range(5)])
+
+    state = (await client.get(f"{API}/events/{event_id}/state")).json()
+    assert state == await _db_state(event_id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load(client, cache, monkeypatch):
+    event_id, loket_ids = await _create_event(client, 2)
+    loads = 0
+    original = events_api.build_loket_states
+
+    async def counting(*args, **kwargs):
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        return await original(*args, **kwargs)
+
+    monkeypatch.setattr(events_api, "build_loket_states", counting)
+    await client.put(f"{API}/events/{event_id}/lokets/{loket_ids[0]}", json={"name": "renamed"})
+
+    responses = await asyncio.gather(*[client.get(f"{API}/events/{event_id}/state") for _ in range(100)])
+
+    assert {r.status_code for r in responses} == {200}
+    assert responses[0].json()[0]["loket_name"] == "renamed"
+    assert loads == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_event_is_not_cached(client, cache):
+    assert (await client.get(f"{API}/events/999999/state")).status_code == 404
+    assert (await client.get(f"{API}/events/999999/state")).status_code == 404
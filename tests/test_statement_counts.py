@@ -0,0 +1,78 @@
+"""
+SQL statements issued per endpoint (commit counted as one), on the
+embedded SQLite writer and reader pool.
+"""
+import pytest
+from sqlalchemy import event
+
+from conftest import API
+from src.config.database import engine, read_engine
+from src.app.services.metadata import metadata
+
+
+@pytest.fixture
+def statements():
+    count = [0]
+
+    def on_statement(*args):
+        count[0] += 1
+
+    targets = [engine.sync_engine, read_engine.sync_engine]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", on_statement)
+        event.listen(target, "commit", on_statement)
+    yield count
+    for target in targets:
+        event.remove(target, "before_cursor_execute", on_statement)
+        event.remove(target, "commit", on_statement)
+
+
+@pytest.mark.asyncio
+async def test_statements_per_endpoint(client, statements):
+    metadata.clear()
+
+    async def call(method, url, expected_status, **kwargs):
+        statements[0] = 0
+        response = await getattr(client, method)(API + url, **kwargs)
+        assert response.status_code == expected_status, response.text
+        return response.json(), statements[0]
+
+    ev, count = await call("post", "/events", 201, json={"name": "E", "code": "COUNTS"})
+    assert count == 3
+    event_id = ev["id"]
+    _, count = await call("put", f"/events/{event_id}", 200, json={"name": "E2"})
+    assert count == 3
+
+    loket, count = await call(
+        "post", f"/events/{event_id}/lokets", 201, json={"name": "L", "code": "A"}
+    )
+    assert count == 3
+    loket_id = loket["id"]
+    _, count = await call(
+        "put", f"/events/{event_id}/lokets/{loket_id}", 200, json={"description": "d"}
+    )
+    assert count == 3
+
+    # allocate, insert, commit + lookup event (dari cache metadata setelahnya)
+    _, count = await call("post", f"/events/{event_id}/lokets/{loket_id}/tickets", 200)
+    assert count == 4
+    _, count = await call("post", f"/events/{event_id}/lokets/{loket_id}/tickets", 200)
+    assert count == 3
+
+    # + seq announcement (update event) & insert announcement
+    _, count = await call("post", f"/lokets/{loket_id}/next", 200)
+    assert count == 5
+    _, count = await call("post", f"/lokets/{loket_id}/repeat", 200)
+    assert count == 5
+    _, count = await call("post", f"/lokets/{loket_id}/hold", 200)
+    assert count == 4
+    _, count = await call("post", f"/lokets/{loket_id}/hold", 400)
+    assert count == 1
+    # 4 + seq announcement & insert announcement
+    _, count = await call("post", f"/lokets/{loket_id}/hold/1/call", 200)
+    assert count == 6
+    _, count = await call("post", f"/lokets/{loket_id}/hold/1/call", 404)
+    assert count == 2
+
+    _, count = await call("post", f"/events/{event_id}/lokets/{loket_id}/reset", 200)
+    assert count == 4
@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from conftest import API, create_loket
+
+
+@pytest.mark.asyncio
+async def test_concurrent_ticket_creation_has_no_duplicates(client):
+    event_id, loket_id = await create_loket(client)
+
+    responses = await asyncio.gather(*[
+        client.post(f"{API}/events/{event_id}/lokets/{loket_id}/tickets")
+        for _ in range(300)
+    ])
+
+    assert {r.status_code for r in responses} == {200}
+    numbers = sorted(r.json()["number"] for r in responses)
+    assert numbers == list(range(1, 301))
+
+    info = (await client.get(f"{API}/lokets/{loket_id}/info")).json()
+    assert info["last_ticket_number"] == 300
+    assert info["queue_length"] == 300
+
+
+@pytest.mark.asyncio
+async def test_create_ticket_unknown_loket(client):
+    event_id, _ = await create_loket(client)
+    response = await client.post(f"{API}/events/{event_id}/lokets/999999/tickets")
+    assert response.status_code == 404